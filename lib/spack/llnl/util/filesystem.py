@@ -376,7 +376,12 @@ def remove_dead_links(root):
         if os.path.islink(path):
             real_path = os.path.realpath(path)
             if not os.path.exists(real_path):
-                os.unlink(path)
+                try:
+                    os.unlink(path)
+                except OSError, e:
+                    # Another process may have removed it already.
+                    if e.errno != errno.ENOENT:
+                        raise
 
 def remove_linked_tree(path):
     """
@@ -390,8 +395,11 @@ def remove_linked_tree(path):
     """
     if os.path.exists(path):
         if os.path.islink(path):
-            shutil.rmtree(os.path.realpath(path), True)
+            # Unlink first so that other processes never see a dead
+            # link that they might try to clean up themselves.
+            real_path = os.path.realpath(path)
             os.unlink(path)
+            shutil.rmtree(real_path, True)
         else:
             shutil.rmtree(path, True)
 
@@ -226,11 +226,14 @@ def key_ordering(cls):
        will compare objects using this key, and the __hash__ function will
        return the hash of this key.
 
-       If a class already has __eq__, __ne__, __lt__, __le__, __gt__, or __ge__
-       defined, this decorator will overwrite them.  If the class does not
-       have a _cmp_key method, then this will raise a TypeError.
+       If a class already defines __eq__, __ne__, __lt__, __le__, __gt__,
+       __ge__, or __hash__ itself, this decorator will leave them alone,
+       so that classes can provide faster versions.  If the class does
+       not have a _cmp_key method, then this will raise a TypeError.
     """
     def setter(name, value):
+        if name in cls.__dict__:
+            return
         value.__name__ = name
         setattr(cls, name, value)
 
@@ -354,6 +357,49 @@ def DictWrapper(dictionary):
     return wrapper()
 
 
+class Singleton(object):
+    """Wrapper for a lazily initialized global object.
+
+    The object is created by calling ``factory`` the first time any of
+    its attributes are used.  Until then, creating the wrapper costs
+    nothing.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self._instance = None
+
+    @property
+    def instance(self):
+        if self._instance is None:
+            self._instance = self.factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        # Avoid infinite recursion if the wrapper is not set up yet,
+        # e.g. while it is being copied.
+        if name in ('factory', '_instance'):
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __getitem__(self, name):
+        return self.instance[name]
+
+    def __contains__(self, element):
+        return element in self.instance
+
+    def __iter__(self):
+        return iter(self.instance)
+
+    def __call__(self, *args, **kwargs):
+        return self.instance(*args, **kwargs)
+
+    def __str__(self):
+        return str(self.instance)
+
+    def __repr__(self):
+        return repr(self.instance)
+
+
 class RequiredAttributeError(ValueError):
     def __init__(self, message):
         super(RequiredAttributeError, self).__init__(message)
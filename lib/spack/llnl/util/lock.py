@@ -31,49 +31,118 @@ import socket
 # Default timeout in seconds, after which locks will raise exceptions.
 _default_timeout = 60
 
-# Sleep time per iteration in spin loop (in seconds)
-_sleep_time = 1e-5
+# Sleep times between attempts to take a contended lock (in seconds).
+# The sleep time starts small and doubles after each failed attempt, up
+# to the maximum, so waiting processes back off instead of spinning.
+_min_sleep_time = 1e-5
+_max_sleep_time = 0.1
+
+# POSIX locks belong to a process and file, and closing *any*
+# descriptor for a file drops all of the process's locks on it.  Locks
+# on regions of the same file therefore share one descriptor, which is
+# only closed once none of them are held.  Maps path -> [fd, count].
+_open_files = {}
 
 
 class Lock(object):
-    def __init__(self,file_path):
+    """A POSIX lock on a file, or on a byte range of a file.
+
+    ``start`` and ``length`` select the byte range to lock.  The
+    default length of 0 locks from ``start`` to the end of the file,
+    so by default the whole file is locked.  Locks on different
+    ranges of the same file do not contend with each other.
+
+    Each lock keeps counts of how often it had to wait, for profiling:
+
+    ``acquisitions``
+        Number of times the underlying POSIX lock was taken.
+    ``retries``
+        Number of attempts that failed because the lock was held.
+    ``wait_time``
+        Total seconds spent waiting for the lock.
+    """
+    def __init__(self, file_path, start=0, length=0):
         self._file_path = file_path
+        self._start = start
+        self._length = length
         self._fd = None
         self._reads = 0
         self._writes = 0
 
+        self.acquisitions = 0
+        self.retries = 0
+        self.wait_time = 0.0
+
+
+    def _open(self):
+        """Get the descriptor shared by all locks on this file."""
+        path = os.path.realpath(self._file_path)
+        if path not in _open_files:
+            _open_files[path] = [os.open(path, os.O_RDWR), 0]
+        entry = _open_files[path]
+        entry[1] += 1
+        return entry[0]
+
+
+    def _close(self):
+        """Close the shared descriptor if no other lock is using it."""
+        path = os.path.realpath(self._file_path)
+        entry = _open_files[path]
+        entry[1] -= 1
+        if entry[1] == 0:
+            os.close(entry[0])
+            del _open_files[path]
+        self._fd = None
+
 
     def _lock(self, op, timeout):
         """This takes a lock using POSIX locks (``fnctl.lockf``).
 
-        The lock is implemented as a spin lock using a nonblocking
-        call to lockf().
+        The lock is taken with nonblocking calls to lockf().  If the
+        lock is held elsewhere, this sleeps between attempts, doubling
+        the sleep time each time up to ``_max_sleep_time``.
 
-        On acquiring an exclusive lock, the lock writes this process's
-        pid and host to the lock file, in case the holding process
-        needs to be killed later.
+        On acquiring an exclusive lock on the whole file, the lock
+        writes this process's pid and host to the lock file, in case
+        the holding process needs to be killed later.
 
-        If the lock times out, it raises a ``LockError``.
+        If the lock times out, it raises a ``LockError``.  A timeout
+        of None waits for the lock indefinitely.
         """
+        if self._fd is None:
+            self._fd = self._open()
+
         start_time = time.time()
-        while (time.time() - start_time) < timeout:
+        sleep_time = _min_sleep_time
+        while True:
             try:
-                if self._fd is None:
-                    self._fd = os.open(self._file_path, os.O_RDWR)
-
-                fcntl.lockf(self._fd, op | fcntl.LOCK_NB)
-                if op == fcntl.LOCK_EX:
-                    os.write(self._fd, "pid=%s,host=%s" % (os.getpid(), socket.getfqdn()))
-                return
+                fcntl.lockf(self._fd, op | fcntl.LOCK_NB,
+                            self._length, self._start)
+                break
 
             except IOError as error:
-                if error.errno == errno.EAGAIN or error.errno == errno.EACCES:
-                    pass
-                else:
+                if error.errno != errno.EAGAIN and error.errno != errno.EACCES:
                     raise
-            time.sleep(_sleep_time)
 
-        raise LockError("Timed out waiting for lock.")
+            self.retries += 1
+            remaining = _max_sleep_time
+            if timeout is not None:
+                remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                self.wait_time += time.time() - start_time
+                if not (self._reads or self._writes):
+                    self._close()
+                raise LockError("Timed out waiting for lock.")
+
+            time.sleep(min(sleep_time, remaining))
+            sleep_time = min(2 * sleep_time, _max_sleep_time)
+
+        self.acquisitions += 1
+        self.wait_time += time.time() - start_time
+
+        if op == fcntl.LOCK_EX and self._start == 0 and self._length == 0:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, "pid=%s,host=%s" % (os.getpid(), socket.getfqdn()))
 
 
     def _unlock(self):
@@ -83,9 +152,8 @@ class Lock(object):
         be masquerading as write locks, but this removes either.
 
         """
-        fcntl.lockf(self._fd,fcntl.LOCK_UN)
-        os.close(self._fd)
-        self._fd = None
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, self._length, self._start)
+        self._close()
 
 
     def acquire_read(self, timeout=_default_timeout):
@@ -27,6 +27,7 @@ import sys
 import tempfile
 import getpass
 from llnl.util.filesystem import *
+from llnl.util.lang import Singleton
 import llnl.util.tty as tty
 
 # This lives in $prefix/lib/spack/spack/__file__
@@ -44,6 +45,7 @@ test_path      = join_path(module_path, "test")
 hooks_path     = join_path(module_path, "hooks")
 var_path       = join_path(spack_root, "var", "spack")
 stage_path     = join_path(var_path, "stage")
+cache_path     = join_path(var_path, "cache")
 repos_path     = join_path(var_path, "repos")
 share_path     = join_path(spack_root, "share", "spack")
 
@@ -52,21 +54,48 @@ opt_path       = join_path(prefix, "opt")
 install_path   = join_path(opt_path, "spack")
 etc_path       = join_path(prefix, "etc")
 
+#
+# The global objects below are only created when they are first used,
+# so that spack commands that do not need them start up quickly.
+#
+
 #
 # Set up the default packages database.
 #
 import spack.repository
-try:
-    repo = spack.repository.RepoPath()
-    sys.meta_path.append(repo)
-except spack.error.SpackError, e:
-    tty.die('while initializing Spack RepoPath:', e.message)
+
+def _repo_path():
+    try:
+        return spack.repository.RepoPath()
+    except spack.error.SpackError, e:
+        tty.die('while initializing Spack RepoPath:', e.message)
+
+repo = Singleton(_repo_path)
+
+
+class _PackageImporter(object):
+    """Import hook for package modules.  Python asks every meta_path
+       hook about every import, so this only sets up the RepoPath when
+       a package module is actually imported."""
+    def find_module(self, fullname, path=None):
+        namespace = spack.repository.repo_namespace
+        if fullname == namespace or fullname.startswith(namespace + '.'):
+            return repo.find_module(fullname, path)
+        return None
+
+sys.meta_path.append(_PackageImporter())
 
 #
 # Set up the installed packages database
 #
+# The index is written as index.yaml by default.  Setting this to
+# 'json' uses a faster index.json; existing YAML indexes are migrated
+# the next time the database is written.
+#
+db_index_format = 'yaml'
+
 from spack.database import Database
-installed_db = Database(install_path)
+installed_db = Singleton(lambda: Database(install_path))
 
 #
 # Paths to built-in Spack repositories.
@@ -79,7 +108,7 @@ mock_packages_path = join_path(repos_path, "builtin.mock")
 # stage directories.
 #
 from spack.directory_layout import YamlDirectoryLayout
-install_layout = YamlDirectoryLayout(install_path)
+install_layout = Singleton(lambda: YamlDirectoryLayout(install_path))
 
 #
 # This controls how packages are sorted when trying to choose
@@ -87,13 +116,13 @@ install_layout = YamlDirectoryLayout(install_path)
 # first.
 #
 from spack.preferred_packages import PreferredPackages
-pkgsort = PreferredPackages()
+pkgsort = Singleton(PreferredPackages)
 
 #
 # This tests ABI compatibility between packages
 #
 from spack.abi import ABI
-abi = ABI()
+abi = Singleton(ABI)
 
 #
 # This controls how things are concretized in spack.
@@ -101,7 +130,7 @@ abi = ABI()
 # policies.
 #
 from spack.concretize import DefaultConcretizer
-concretizer = DefaultConcretizer()
+concretizer = Singleton(DefaultConcretizer)
 
 # Version information
 from spack.version import Version
@@ -116,7 +145,7 @@ from spack.util.executable import Executable, which
 editor = Executable(os.environ.get("EDITOR", "vi"))
 
 # Curl tool for fetching files.
-curl = which("curl", required=True)
+curl = Singleton(lambda: which("curl", required=True))
 
 # Whether to build in tmp space or directly in the stage_path.
 # If this is true, then spack will make stage directories in
@@ -146,6 +175,52 @@ for path in _tmp_candidates:
 # for.
 do_checksum = True
 
+# Maximum number of source archives to download at once when a whole
+# DAG is prefetched (spack install --fetch-jobs), and maximum number of
+# those downloads from any one host.
+fetch_jobs = 4
+fetch_jobs_per_host = 2
+
+# Source archives that pass their checksum are kept here, by checksum,
+# so they are only downloaded once.  The least recently used ones are
+# removed when the cache grows past download_cache_size bytes.  Set
+# download_cache to None to disable the cache.
+download_cache_size = 10 * 2**30
+
+# The cache modules are imported here rather than in the factories:
+# importing spack.download_cache later would set this module's
+# download_cache attribute to the module, hiding the Singleton.
+from spack.download_cache import DownloadCache
+download_cache = Singleton(
+    lambda: DownloadCache(join_path(cache_path, "downloads"), download_cache_size))
+
+# Concretized specs are cached here, so that concretizing the same
+# abstract spec again is fast.  Set this to None to disable the cache.
+from spack.concretization_cache import ConcretizationCache
+concretization_cache = Singleton(
+    lambda: ConcretizationCache(join_path(cache_path, "concretized")))
+
+# Versions of compilers found in PATH are cached here, so that
+# unchanged compiler executables are not run again to detect them.
+# Set this to None to disable the cache.
+from spack.compiler_cache import CompilerVersionCache
+compiler_cache = Singleton(
+    lambda: CompilerVersionCache(join_path(cache_path, "compilers")))
+
+# Web pages that Spack scrapes for package versions are cached here,
+# and revalidated with their servers using ETag and Last-Modified.
+# Set this to None to disable the cache.
+web_cache_path = join_path(cache_path, "web")
+
+# Versions of packages found by spidering their list_urls are cached
+# here, and spidered again when they are older than
+# remote_versions_ttl seconds.  Set this to None to disable the cache.
+remote_versions_ttl = 24 * 60 * 60
+
+from spack.remote_version_cache import RemoteVersionCache
+remote_version_cache = Singleton(
+    lambda: RemoteVersionCache(join_path(cache_path, "versions"), remote_versions_ttl))
+
 #
 # SYS_TYPE to use for the spack installation.
 # Value of this determines what platform spack thinks it is by
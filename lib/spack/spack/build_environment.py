@@ -329,7 +329,7 @@ def setup_package(pkg):
     spack_env.apply_modifications()
 
 
-def fork(pkg, function):
+def fork(pkg, function, wait=True):
     """Fork a child process to do part of a spack build.
 
     Arguments:
@@ -337,6 +337,8 @@ def fork(pkg, function):
     pkg -- pkg whose environemnt we should set up the
            forked process for.
     function -- arg-less function to run in the child process.
+    wait -- if False, return the child's pid immediately instead of
+            waiting for it.  The caller is responsible for reaping it.
 
     Usage:
        def child_fun():
@@ -380,6 +382,9 @@ def fork(pkg, function):
             os._exit(1)
 
     else:
+        if not wait:
+            return pid
+
         # Parent process just waits for the child to complete.  If the
         # child exited badly, assume it already printed an appropriate
         # message.  Just make the parent exit with an error code.
@@ -25,9 +25,11 @@
 import os
 import re
 import sys
+import json
 
 import llnl.util.tty as tty
 from llnl.util.lang import attr_setdefault
+from llnl.util.filesystem import mkdirp
 
 import spack
 import spack.spec
@@ -87,6 +89,44 @@ def get_command(name):
     return getattr(get_module(name), get_cmd_function_name(name))
 
 
+def get_descriptions():
+    """Returns a dict mapping each command name to its description.
+
+    Importing every command module just to list the commands is slow,
+    so descriptions are cached in a file.  A command module is only
+    imported if it changed since its description was cached.
+    """
+    cache_file = os.path.join(spack.cache_path, 'commands.json')
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (IOError, ValueError):
+        cache = {}
+
+    descriptions = {}
+    entries = {}
+    for cmd in commands:
+        mtime = os.path.getmtime(os.path.join(command_path, cmd + ".py"))
+        entry = cache.get(cmd)
+        if not entry or entry[0] != mtime:
+            entry = [mtime, get_module(cmd).description]
+        entries[cmd] = entry
+        descriptions[cmd] = str(entry[1])
+
+    if entries != cache:
+        tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+        try:
+            mkdirp(spack.cache_path)
+            with open(tmp_file, 'w') as f:
+                json.dump(entries, f)
+            os.rename(tmp_file, cache_file)
+        except (IOError, OSError):
+            # The cache is only an optimization.
+            pass
+
+    return descriptions
+
+
 def parse_specs(args, **kwargs):
     """Convenience function for parsing arguments from specs.  Handles common
        exceptions and dies if there are errors.
@@ -23,12 +23,11 @@
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
 import argparse
-import hashlib
 
 import llnl.util.tty as tty
 import spack
 import spack.cmd
-import spack.util.crypto
+from spack.fetch_strategy import URLFetchStrategy
 from spack.stage import Stage, FailedDownloadError
 from spack.version import *
 
@@ -41,6 +40,9 @@ def setup_parser(subparser):
     subparser.add_argument(
         '--keep-stage', action='store_true', dest='keep_stage',
         help="Don't clean up staging area when command completes.")
+    subparser.add_argument(
+        '--refresh', action='store_true', dest='refresh',
+        help="Fetch remote versions even if they are cached.")
     subparser.add_argument(
         'versions', nargs=argparse.REMAINDER, help='Versions to generate checksums for')
 
@@ -56,13 +58,14 @@ def get_checksums(versions, urls, **kwargs):
     i = 0
     for url, version in zip(urls, versions):
         try:
-            with Stage(url, keep=keep_stage) as stage:
+            # The md5 is computed while the archive downloads.
+            fetcher = URLFetchStrategy(url, hashes=['md5'])
+            with Stage(fetcher, keep=keep_stage) as stage:
                 stage.fetch()
                 if i == 0 and first_stage_function:
                     first_stage_function(stage)
 
-                hashes.append((version,
-                               spack.util.crypto.checksum(hashlib.md5, stage.archive_file)))
+                hashes.append((version, stage.fetcher.archive_digest('md5')))
                 i += 1
         except FailedDownloadError as e:
             tty.msg("Failed to fetch %s" % url)
@@ -86,7 +89,7 @@ def checksum(parser, args):
                         "version ranges.  Use unambiguous versions.")
             versions[v] = pkg.url_for_version(v)
     else:
-        versions = pkg.fetch_remote_versions()
+        versions = pkg.fetch_remote_versions(refresh=args.refresh)
         if not versions:
             tty.die("Could not fetch any versions for %s" % pkg.name)
 
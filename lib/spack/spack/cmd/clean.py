@@ -32,12 +32,23 @@ import spack.cmd
 description = "Remove build stage and source tarball for packages."
 
 def setup_parser(subparser):
+    subparser.add_argument(
+        '-d', '--downloads', action='store_true',
+        help="Remove all archives from the download cache.")
     subparser.add_argument('packages', nargs=argparse.REMAINDER,
                            help="specs of packages to clean")
 
 
 def clean(parser, args):
-    if not args.packages:
+    if args.downloads:
+        cache = spack.download_cache
+        if cache:
+            cache.destroy()
+            tty.msg("Removed cached downloads in %s" % cache.root)
+        else:
+            tty.msg("The download cache is disabled.")
+
+    elif not args.packages:
         tty.die("spack clean requires at least one package spec.")
 
     specs = spack.cmd.parse_specs(args.packages, concretize=True)
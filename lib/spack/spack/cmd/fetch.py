@@ -24,8 +24,11 @@
 ##############################################################################
 import argparse
 
+import llnl.util.tty as tty
+
 import spack
 import spack.cmd
+from spack.prefetch import Prefetcher
 
 description = "Fetch archives for packages"
 
@@ -37,6 +40,10 @@ def setup_parser(subparser):
         '-m', '--missing', action='store_true', help="Also fetch all missing dependencies")
     subparser.add_argument(
         '-D', '--dependencies', action='store_true', help="Also fetch all dependencies")
+    subparser.add_argument(
+        '-j', '--jobs', action='store', type=int, default=spack.fetch_jobs,
+        help="Download up to this many packages at once.  Default is %d."
+        % spack.fetch_jobs)
     subparser.add_argument(
         'packages', nargs=argparse.REMAINDER, help="specs of packages to fetch")
 
@@ -44,10 +51,27 @@ def fetch(parser, args):
     if not args.packages:
         tty.die("fetch requires at least one package argument")
 
+    if args.jobs <= 0:
+        tty.die("The -j option must be a positive integer!")
+
     if args.no_checksum:
         spack.do_checksum = False
 
     specs = spack.cmd.parse_specs(args.packages, concretize=True)
+
+    # Download everything concurrently first.  The loop below then
+    # finds the archives already fetched, and retries any failures.
+    if args.jobs > 1:
+        to_fetch = {}
+        for spec in specs:
+            to_fetch[spec.dag_hash()] = spec.package
+            if args.missing or args.dependencies:
+                for s in spec.traverse():
+                    if args.missing and s.package.installed:
+                        continue
+                    to_fetch[s.dag_hash()] = s.package
+        Prefetcher(to_fetch.values(), args.jobs).fetch()
+
     for spec in specs:
         if args.missing or args.dependencies:
             to_fetch = set()
@@ -38,6 +38,18 @@ def setup_parser(subparser):
     subparser.add_argument(
         '-j', '--jobs', action='store', type=int,
         help="Explicitly set number of make jobs.  Default is #cpus.")
+    subparser.add_argument(
+        '-p', '--parallel-packages', action='store', type=int, default=1,
+        dest='parallel_packages',
+        help="Build up to this many dependencies at once.  Make jobs are split among them.")
+    subparser.add_argument(
+        '--keep-going', action='store_true', dest='keep_going',
+        help="With -p, keep building independent packages after a build fails.")
+    subparser.add_argument(
+        '--fetch-jobs', action='store', type=int, default=1,
+        dest='fetch_jobs',
+        help="Download up to this many sources at once before building.  "
+        "Default is 1, which fetches each source when it is built.")
     subparser.add_argument(
         '--keep-prefix', action='store_true', dest='keep_prefix',
         help="Don't remove the install prefix if installation fails.")
@@ -65,17 +77,28 @@ def install(parser, args):
         if args.jobs <= 0:
             tty.die("The -j option must be a positive integer!")
 
+    if args.parallel_packages <= 0:
+        tty.die("The -p option must be a positive integer!")
+
+    if args.fetch_jobs <= 0:
+        tty.die("The --fetch-jobs option must be a positive integer!")
+
     if args.no_checksum:
         spack.do_checksum = False        # TODO: remove this global.
 
     specs = spack.cmd.parse_specs(args.packages, concretize=True)
     for spec in specs:
+        # Installs are synchronized by per-spec prefix locks; the DB
+        # is only locked while each package is registered, so other
+        # spack processes can install into the same tree meanwhile.
         package = spack.repo.get(spec)
-        with spack.installed_db.write_transaction():
-            package.do_install(
-                keep_prefix=args.keep_prefix,
-                keep_stage=args.keep_stage,
-                ignore_deps=args.ignore_deps,
-                make_jobs=args.jobs,
-                verbose=args.verbose,
-                fake=args.fake)
+        package.do_install(
+            keep_prefix=args.keep_prefix,
+            keep_stage=args.keep_stage,
+            ignore_deps=args.ignore_deps,
+            make_jobs=args.jobs,
+            verbose=args.verbose,
+            fake=args.fake,
+            parallel_packages=args.parallel_packages,
+            keep_going=args.keep_going,
+            fetch_jobs=args.fetch_jobs)
@@ -28,6 +28,7 @@ import os
 
 import llnl.util.tty as tty
 import spack.util.crypto
+from spack.fetch_strategy import URLFetchStrategy
 from spack.stage import Stage, FailedDownloadError
 
 description = "Calculate md5 checksums for files/urls."
@@ -41,9 +42,9 @@ def setup_parser(subparser):
 
 def compute_md5_checksum(url):
     if not os.path.isfile(url):
-        with Stage(url) as stage:
+        with Stage(URLFetchStrategy(url, hashes=['md5'])) as stage:
             stage.fetch()
-            value = spack.util.crypto.checksum(hashlib.md5, stage.archive_file)
+            value = stage.fetcher.archive_digest('md5')
     else:
         value = spack.util.crypto.checksum(hashlib.md5, url)
     return value
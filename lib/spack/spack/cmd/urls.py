@@ -40,16 +40,12 @@ def setup_parser(subparser):
 
 
 def urls(parser, args):
+    # The URLs come from the package index, so packages are only
+    # imported if they changed since the index was written.
     urls = set()
-    for pkg in spack.repo.all_packages():
-        url = getattr(pkg.__class__, 'url', None)
-        if url:
-            urls.add(url)
-
-        for params in pkg.versions.values():
-            url = params.get('url', None)
-            if url:
-                urls.add(url)
+    for name in spack.repo.all_package_names():
+        repo = spack.repo.repo_for_pkg(name)
+        urls.update(repo.package_index.urls(name))
 
     for url in sorted(urls):
         if args.color or args.extrapolation:
@@ -26,18 +26,73 @@ import os
 from llnl.util.tty.colify import colify
 import llnl.util.tty as tty
 import spack
+import spack.error
+from spack.remote_version_cache import fetch_remote_versions
 
 description ="List available versions of a package"
 
 def setup_parser(subparser):
-    subparser.add_argument('package', metavar='PACKAGE', help='Package to list versions for')
+    subparser.add_argument(
+        '--refresh', action='store_true', dest='refresh',
+        help="Fetch remote versions even if they are cached.")
+    subparser.add_argument(
+        '--outdated', action='store_true', dest='outdated',
+        help="Show packages with remote versions newer than their newest "
+             "safe version.  Checks all packages if none is given.")
+    subparser.add_argument(
+        'package', metavar='PACKAGE', nargs='?', help='Package to list versions for')
+
+
+def outdated(args):
+    if args.package:
+        names = [args.package]
+    else:
+        names = spack.repo.all_package_names()
+
+    pkgs = []
+    for name in names:
+        try:
+            pkg = spack.repo.get(name)
+        except spack.error.SpackError, e:
+            tty.debug("Skipping %s: %s" % (name, e))
+            continue
+        if pkg.all_urls and pkg.versions:
+            pkgs.append(pkg)
+
+    tty.msg("Checking remote versions of %d packages" % len(pkgs))
+    fetched = fetch_remote_versions(pkgs, refresh=args.refresh)
+
+    rows = []
+    for pkg, fetched_versions in zip(pkgs, fetched):
+        if not fetched_versions:
+            continue
+        newest_safe = max(pkg.versions)
+        newest_remote = max(fetched_versions)
+        if newest_remote > newest_safe:
+            rows.append((pkg.name, newest_safe, newest_remote))
+
+    if not rows:
+        tty.msg("No outdated packages found.")
+        return
+
+    tty.msg("Outdated packages:")
+    width = max(len(name) for name, _, _ in rows) + 2
+    for name, safe, remote in rows:
+        print "  %-*s%-12s -> %s" % (width, name, safe, remote)
 
 
 def versions(parser, args):
+    if args.outdated:
+        outdated(args)
+        return
+
+    if not args.package:
+        tty.die("versions requires a package argument.")
+
     pkg = spack.repo.get(args.package)
 
     safe_versions = pkg.versions
-    fetched_versions = pkg.fetch_remote_versions()
+    fetched_versions = pkg.fetch_remote_versions(refresh=args.refresh)
     remote_versions = set(fetched_versions).difference(safe_versions)
 
     tty.msg("Safe versions (already checksummed):")
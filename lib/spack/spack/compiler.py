@@ -31,6 +31,7 @@ import llnl.util.tty as tty
 from llnl.util.lang import memoized
 from llnl.util.filesystem import join_path
 
+import spack
 import spack.error
 import spack.spec
 from spack.util.multiproc import parmap
@@ -186,10 +187,19 @@ class Compiler(object):
                         key = (full_path,) + match.groups()
                         checks.append(key)
 
+        # Detected versions are cached by executable, so that unchanged
+        # compilers aren't run again.
+        cache = spack.compiler_cache
+        detector = '%s.%s' % (cls.__name__, detect_version.__name__)
+
         def check(key):
             try:
                 full_path, prefix, suffix = key
-                version = detect_version(full_path)
+                version = cache.fetch(detector, full_path) if cache else None
+                if version is None:
+                    version = detect_version(full_path)
+                    if cache:
+                        cache.store(detector, full_path, version)
                 return (version, prefix, suffix, full_path)
             except ProcessError, e:
                 tty.debug("Couldn't get version for compiler %s" % full_path, e)
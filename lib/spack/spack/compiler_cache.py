@@ -0,0 +1,122 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Cache of detected compiler versions.
+
+Finding compilers runs every candidate executable in PATH to get its
+version, which is slow when PATH is long.  This caches the version
+detected for each executable, in ``<root>/<hash>.json``, along with
+the inode, modification time and size of the file it resolves to.
+The executable is only run again if one of those changes.
+
+Failed detections are not cached, since some compilers fail for
+reasons that have nothing to do with the executable, e.g. when their
+license server is down.
+"""
+import os
+import json
+import shutil
+import hashlib
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import join_path, mkdirp
+
+
+class CompilerVersionCache(object):
+    def __init__(self, root):
+        """Create a compiler version cache in the directory ``root``."""
+        self.root = root
+
+
+    def path_for(self, detector, exe):
+        """Path of the cache entry for the version of ``exe`` detected
+           by ``detector``, which names the detection method."""
+        digest = hashlib.sha1(repr((detector, exe))).hexdigest()
+        return join_path(self.root, digest + '.json')
+
+
+    def fetch(self, detector, exe):
+        """Get the cached version of ``exe``, or None if it isn't
+           cached or the executable has changed."""
+        path = self.path_for(detector, exe)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            if entry['identity'] != _identity(exe):
+                return None
+            # json gives back unicode; detection gives str.
+            return str(entry['version'])
+
+        except Exception, e:
+            # The cache is only an optimization.
+            tty.debug("Could not read cached version of %s: %s" % (exe, e))
+            return None
+
+
+    def store(self, detector, exe, version):
+        """Cache ``version`` as the version of ``exe``.  Failed
+           detections (None or 'unknown') are not cached."""
+        if version is None or version == 'unknown':
+            return
+
+        identity = _identity(exe)
+        if identity is None:
+            return
+
+        # Compilers are detected in parallel processes, so each entry
+        # is written to its own file, and moved into place atomically.
+        dest = self.path_for(detector, exe)
+        tmp = '%s.%d.tmp' % (dest, os.getpid())
+        entry = { 'detector' : detector,
+                  'exe'      : exe,
+                  'identity' : identity,
+                  'version'  : version }
+        try:
+            mkdirp(self.root)
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp, dest)
+        except (IOError, OSError), e:
+            tty.debug("Could not cache version of %s: %s" % (exe, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+    def destroy(self):
+        """Remove all cached versions."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _identity(exe):
+    """Real path, inode, modification time and size of the file that
+       ``exe`` resolves to, or None if it doesn't exist."""
+    realpath = os.path.realpath(exe)
+    try:
+        st = os.stat(realpath)
+    except OSError:
+        return None
+    return [realpath, st.st_ino, st.st_mtime, st.st_size]
@@ -0,0 +1,184 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Cache of concretized specs.
+
+Concretizing a spec is expensive, and users concretize the same
+abstract specs over and over.  Each abstract spec's concrete DAG is
+stored in ``<root>/<hash of abstract spec>.yaml``, along with a
+fingerprint of everything else concretization depends on:
+
+  * the ``package.py`` files in all package repositories,
+  * the configuration files in all configuration scopes,
+  * the available compilers and the system type, and
+  * the Spack version.
+
+A cached spec is only used if its fingerprint matches the current
+one, so the cache is invalidated whenever any of these change.
+Specs that use external packages are not cached.
+
+The fingerprint is computed once per process, and again only when a
+repository is added or removed or the configuration changes.  Package
+files edited while Spack is running are noticed the next time it runs.
+"""
+import os
+import hashlib
+import shutil
+
+import yaml
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import join_path, mkdirp
+
+import spack
+import spack.spec
+import spack.config
+import spack.compilers
+import spack.architecture
+from spack.repository import package_file_name
+
+
+class ConcretizationCache(object):
+    def __init__(self, root):
+        """Create a concretization cache in the directory ``root``."""
+        self.root = root
+        self._fingerprint = None
+
+
+    def path_for(self, abstract_spec):
+        """Path where the concretization of abstract_spec is cached."""
+        return join_path(self.root, abstract_spec.dag_hash() + '.yaml')
+
+
+    def fingerprint(self):
+        """Hash of the current state of everything other than the
+           abstract spec that concretization depends on."""
+        state = (spack.config.generation,
+                 tuple((repo.namespace, repo.root) for repo in spack.repo.repos))
+        if self._fingerprint is None or self._fingerprint[0] != state:
+            self._fingerprint = (state, self._compute_fingerprint())
+        return self._fingerprint[1]
+
+
+    def _compute_fingerprint(self):
+        sha = hashlib.sha1()
+        def add(*values):
+            sha.update(repr(values))
+
+        add(str(spack.spack_version), spack.architecture.sys_type())
+        add(*sorted(str(c) for c in spack.compilers.all_compilers()))
+
+        for repo in spack.repo.repos:
+            add(repo.namespace, repo.root)
+            for name in repo.all_package_names():
+                add(*_stat(join_path(repo.packages_path, name, package_file_name)))
+
+        for scope in spack.config.config_scopes.values():
+            for section in sorted(spack.config.section_schemas):
+                add(*_stat(scope.get_section_filename(section)))
+
+        return sha.hexdigest()
+
+
+    def fetch(self, abstract_spec, fingerprint):
+        """Get the cached concretization of abstract_spec, if there is
+           one with a matching fingerprint.  Returns None if not."""
+        path = self.path_for(abstract_spec)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path) as f:
+                entry = yaml.load(f)
+            if entry['fingerprint'] != fingerprint:
+                return None
+
+            # Build the DAG up from its nodes, which are stored in
+            # pre-order, so the root comes first.
+            specs = {}
+            for node in entry['spec']:
+                name = next(iter(node))
+                specs[node[name]['hash']] = spack.spec.Spec.from_node_dict(node)
+
+            for node in entry['spec']:
+                name = next(iter(node))
+                spec = specs[node[name]['hash']]
+                for dep_hash in node[name]['dependencies'].values():
+                    spec._add_dependency(specs[dep_hash])
+
+            root_hash = next(iter(entry['spec'][0].values()))['hash']
+            concrete = specs[root_hash]
+            concrete._mark_concrete()
+
+            # The DAG must hash the same as when it was stored.
+            if concrete.dag_hash() != root_hash:
+                return None
+            return concrete
+
+        except Exception, e:
+            # The cache is only an optimization.
+            tty.debug("Could not read cached spec %s: %s" % (path, e))
+            return None
+
+
+    def store(self, abstract_spec, concrete_spec, fingerprint):
+        """Cache concrete_spec as the concretization of abstract_spec,
+           as of the given fingerprint."""
+        if any(s.external for s in concrete_spec.traverse()):
+            return
+
+        concrete_spec.dag_hash()
+        node_list = []
+        for s in concrete_spec.traverse(order='pre'):
+            node = s.to_node_dict()
+            node[s.name]['hash'] = s.dag_hash()
+            node_list.append(node)
+
+        dest = self.path_for(abstract_spec)
+        tmp = '%s.%d.tmp' % (dest, os.getpid())
+        try:
+            mkdirp(self.root)
+            with open(tmp, 'w') as f:
+                yaml.dump({ 'fingerprint' : fingerprint, 'spec' : node_list },
+                          f, default_flow_style=False)
+            os.rename(tmp, dest)
+        except (IOError, OSError), e:
+            tty.debug("Could not cache %s: %s" % (dest, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+    def destroy(self):
+        """Remove all cached specs."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _stat(path):
+    """Path, modification time and size of a file, or just the path if
+       the file does not exist."""
+    try:
+        st = os.stat(path)
+        return (path, st.st_mtime, st.st_size)
+    except OSError:
+        return (path,)
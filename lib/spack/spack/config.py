@@ -267,6 +267,14 @@ section_schemas = {
 """
 config_scopes = OrderedDict()
 
+"""Incremented whenever a config scope is added, re-read or updated, so
+   that values derived from the configuration know to recompute."""
+generation = 0
+
+def _config_changed():
+    global generation
+    generation += 1
+
 
 def validate_section_name(section):
     """Raise a ValueError if the section is not a valid section."""
@@ -342,6 +350,7 @@ class ConfigScope(object):
         # TODO: make this cleaner.  Mocking up for testing is brittle.
         global config_scopes
         config_scopes[name] = self
+        _config_changed()
 
     def get_section_filename(self, section):
         validate_section_name(section)
@@ -374,6 +383,7 @@ class ConfigScope(object):
     def clear(self):
         """Empty cached config information."""
         self.sections = {}
+        _config_changed()
 
 
 ConfigScope('site', os.path.join(spack.etc_path, 'spack')),
@@ -547,6 +557,7 @@ def update_config(section, update_data, scope=None):
 
     # read only the requested section's data.
     scope.sections[section] = { section : update_data }
+    _config_changed()
     scope.write_section(section)
 
 
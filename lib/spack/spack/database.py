@@ -42,6 +42,9 @@ filesystem.
 import os
 import time
 import socket
+import json
+import base64
+from contextlib import contextmanager
 
 import yaml
 from yaml.error import MarkedYAMLError, YAMLError
@@ -50,6 +53,7 @@ import llnl.util.tty as tty
 from llnl.util.filesystem import *
 from llnl.util.lock import *
 
+import spack
 import spack.spec
 from spack.version import Version
 from spack.spec import Spec
@@ -65,6 +69,14 @@ _db_version = Version('0.9')
 # Default timeout for spack database locks is 5 min.
 _db_lock_timeout = 60
 
+# Prefix locks are held for entire builds, so by default processes
+# wait for them indefinitely.
+_prefix_lock_timeout = None
+
+# Supported formats for the database index file.  The index is stored
+# in index.<format> in the DB directory.
+_db_index_formats = ('yaml', 'json')
+
 
 def _autospec(function):
     """Decorator that automatically converts the argument of a single-arg
@@ -76,6 +88,21 @@ def _autospec(function):
     return converter
 
 
+def _byteify(data):
+    """Convert unicode strings loaded from JSON back to str.
+
+    Specs built from unicode strings hash differently, since YAML
+    tags them as python/unicode.
+    """
+    if isinstance(data, dict):
+        return dict((_byteify(k), _byteify(v)) for k, v in data.iteritems())
+    elif isinstance(data, list):
+        return [_byteify(elt) for elt in data]
+    elif isinstance(data, unicode):
+        return data.encode('utf-8')
+    return data
+
+
 class InstallRecord(object):
     """A record represents one installation in the DB.
 
@@ -93,11 +120,28 @@ class InstallRecord(object):
 
     """
     def __init__(self, spec, path, installed, ref_count=0):
-        self.spec = spec
+        self._spec = spec
         self.path = str(path)
         self.installed = bool(installed)
         self.ref_count = ref_count
 
+    @property
+    def spec(self):
+        return self._spec
+
+    @property
+    def name(self):
+        return self.spec.name
+
+    @property
+    def node(self):
+        """The root node of this record's spec, used for indexing."""
+        return self.spec
+
+    def dependency_hashes(self):
+        """DAG hashes of the direct dependencies of this record's spec."""
+        return [dep.dag_hash() for dep in self.spec.dependencies.values()]
+
     def to_dict(self):
         return { 'spec'      : self.spec.to_node_dict(),
                  'path'      : self.path,
@@ -110,8 +154,144 @@ class InstallRecord(object):
         return InstallRecord(spec, d['path'], d['installed'], d['ref_count'])
 
 
+class LazyInstallRecord(InstallRecord):
+    """An InstallRecord whose spec is only built when it is first used.
+
+    ``read_spec`` is a function that builds the spec.  Until it is
+    called, the record keeps the node dict it was read from, so it can
+    be written back out without ever constructing a Spec.
+    """
+    def __init__(self, read_spec, dictionary):
+        d = dictionary
+        super(LazyInstallRecord, self).__init__(
+            None, d['path'], d['installed'], d['ref_count'])
+        self._read_spec = read_spec
+        self._node_dict = d['spec']
+
+    @property
+    def spec(self):
+        if self._spec is None:
+            self._spec = self._read_spec()
+        return self._spec
+
+    @property
+    def name(self):
+        return next(iter(self._node_dict))
+
+    @property
+    def node(self):
+        if self._spec is not None:
+            return self._spec
+        return Spec.from_node_dict(self._node_dict)
+
+    def dependency_hashes(self):
+        if self._spec is not None:
+            return super(LazyInstallRecord, self).dependency_hashes()
+        return self._node_dict[self.name]['dependencies'].values()
+
+    def to_dict(self):
+        if self._spec is not None:
+            return super(LazyInstallRecord, self).to_dict()
+        return { 'spec'      : self._node_dict,
+                 'path'      : self.path,
+                 'installed' : self.installed,
+                 'ref_count' : self.ref_count }
+
+
+class _QueryIndex(object):
+    """Secondary indexes on the records in a Database.
+
+    Maps the name, versions, compiler, architecture and namespace of
+    each record's root node to the keys of the records that have them,
+    so that queries only need to check records that could match.
+
+    Also maps the key of each record to the keys of the records that
+    depend on it directly, so dependents can be found without looking
+    at every spec in the database.
+    """
+    _fields = ('name', 'versions', 'compiler', 'architecture', 'namespace')
+
+    def __init__(self, data):
+        self._index = dict((field, {}) for field in self._fields)
+        self._dependents = {}
+        for key, rec in data.items():
+            self.add(key, rec)
+
+
+    def add(self, key, rec):
+        node = rec.node
+        for field in self._fields:
+            value = getattr(node, field)
+            self._index[field].setdefault(value, set()).add(key)
+
+        for dep_key in rec.dependency_hashes():
+            self._dependents.setdefault(dep_key, set()).add(key)
+
+
+    def remove(self, key, rec):
+        node = rec.node
+        for field in self._fields:
+            value = getattr(node, field)
+            keys = self._index[field][value]
+            keys.discard(key)
+            if not keys:
+                del self._index[field][value]
+
+        for dep_key in rec.dependency_hashes():
+            keys = self._dependents[dep_key]
+            keys.discard(key)
+            if not keys:
+                del self._dependents[dep_key]
+
+
+    def dependents(self, key):
+        """Keys of the records that depend directly on the record
+           with the given key."""
+        return self._dependents.get(key, ())
+
+
+    def _keys_where(self, field, test):
+        """Keys of records whose value for field passes test."""
+        return set().union(*[keys for value, keys
+                             in self._index[field].items() if test(value)])
+
+
+    def candidates(self, query_spec):
+        """Keys of records that may satisfy query_spec.
+
+        This is a superset of the matching records; each candidate
+        still needs to be checked with satisfies().  Returns None if
+        every record is a candidate.
+        """
+        q = query_spec
+        if not q.name:
+            return None
+
+        if q.virtual:
+            # Versions and other constraints apply to the virtual
+            # package, so only narrow the search down to providers.
+            names = set(p.name for p in spack.repo.providers_for(q))
+            return self._keys_where('name', lambda n: n in names)
+
+        # These mirror the checks on the root node in Spec.satisfies().
+        result = set(self._index['name'].get(q.name, ()))
+        if q.namespace is not None:
+            result &= self._keys_where(
+                'namespace', lambda ns: ns is None or ns == q.namespace)
+        if q.versions:
+            result &= self._keys_where(
+                'versions', lambda v: not v or v.satisfies(q.versions))
+        if q.compiler:
+            result &= self._keys_where(
+                'compiler', lambda c: not c or c.satisfies(q.compiler))
+        if q.architecture:
+            result &= self._keys_where(
+                'architecture', lambda a: not a or a == q.architecture)
+        return result
+
+
 class Database(object):
-    def __init__(self, root, db_dir=None):
+    def __init__(self, root, db_dir=None, index_format=None):
         """Create a Database for Spack installations under ``root``.
 
         A Database is a cache of Specs data from ``$prefix/spec.yaml``
@@ -130,6 +310,13 @@ class Database(object):
         where data will be stored.  This is intended to be used for
         testing the Database class.
 
+        ``index_format`` selects the format the index is written in,
+        either ``yaml`` (``index.yaml``) or ``json`` (``index.json``).
+        It defaults to ``spack.db_index_format``.  JSON indexes load
+        much faster, and specs in them are only built when used.  If
+        the DB directory holds a newer index in the other format,
+        that one is read, which migrates the DB on its next write.
+
         """
         self.root = root
 
@@ -140,10 +327,23 @@ class Database(object):
             # Allow customizing the database directory location for testing.
             self._db_dir = db_dir
 
+        if index_format is None:
+            index_format = spack.db_index_format
+        if index_format not in _db_index_formats:
+            raise ValueError("Invalid database index format: %s" % index_format)
+        self._index_format = index_format
+
         # Set up layout of database files within the db dir
-        self._index_path = join_path(self._db_dir, 'index.yaml')
+        self._index_paths = dict(
+            (fmt, join_path(self._db_dir, 'index.' + fmt))
+            for fmt in _db_index_formats)
+        self._index_path = self._index_paths[index_format]
         self._lock_path  = join_path(self._db_dir, 'lock')
 
+        # Install prefixes are locked by locking one byte per spec in
+        # this file.  See prefix_lock().
+        self._prefix_lock_path = join_path(self._db_dir, 'prefix_lock')
+
         # Create needed directories and files
         if not os.path.exists(self._db_dir):
             mkdirp(self._db_dir)
@@ -151,10 +351,22 @@ class Database(object):
         if not os.path.exists(self._lock_path):
             touch(self._lock_path)
 
+        if not os.path.exists(self._prefix_lock_path):
+            touch(self._prefix_lock_path)
+
         # initialize rest of state.
         self.lock = Lock(self._lock_path)
+        self._prefix_locks = {}
         self._data = {}
 
+        # Identifies the index file that _data was last read from or
+        # written to.  See _index_key().
+        self._index_key = None
+
+        # Secondary indexes for query(), and the _data they index.
+        self._query_index = None
+        self._query_index_data = None
+
 
     def write_transaction(self, timeout=_db_lock_timeout):
         """Get a write lock context manager for use in a `with` block."""
@@ -166,6 +378,32 @@ class Database(object):
         return ReadTransaction(self, self._read, None, timeout)
 
 
+    def prefix_lock(self, spec):
+        """Get a lock on the install prefix of a concrete spec.
+
+        Each spec gets its own byte in the prefix lock file, at an
+        offset taken from its DAG hash, so processes installing
+        different specs do not contend for the same lock.
+        """
+        key = spec.dag_hash()
+        if key not in self._prefix_locks:
+            offset = int(base64.b32decode(key.upper()).encode('hex')[:15], 16)
+            self._prefix_locks[key] = Lock(self._prefix_lock_path, offset, 1)
+        return self._prefix_locks[key]
+
+
+    @contextmanager
+    def prefix_write_lock(self, spec, timeout=_prefix_lock_timeout):
+        """Hold an exclusive lock on the install prefix of a spec for
+           the duration of a `with` block."""
+        lock = self.prefix_lock(spec)
+        lock.acquire_write(timeout)
+        try:
+            yield
+        finally:
+            lock.release_write()
+
+
     def _write_to_yaml(self, stream):
         """Write out the databsae to a YAML file.
 
@@ -193,6 +431,22 @@ class Database(object):
             raise SpackYAMLError("error writing YAML database:", str(e))
 
 
+    def _write_to_json(self, stream):
+        """Write out the database to a compact JSON file.
+
+        This has the same structure as the YAML file.  It does not do
+        any locking or transactions.
+        """
+        installs = dict((k, v.to_dict()) for k, v in self._data.items())
+        database = {
+            'database' : {
+                'installs' : installs,
+                'version' : str(_db_version)
+            }
+        }
+        json.dump(database, stream, separators=(',', ':'))
+
+
     def _read_spec_from_yaml(self, hash_key, installs, parent_key=None):
         """Recursively construct a spec from a hash in a YAML database.
 
@@ -238,23 +492,9 @@ class Database(object):
         if yfile is None:
             return
 
-        def check(cond, msg):
-            if not cond: raise CorruptDatabaseError(self._index_path, msg)
-
-        check('database' in yfile, "No 'database' attribute in YAML.")
-
-        # High-level file checks
-        db = yfile['database']
-        check('installs' in db, "No 'installs' in YAML DB.")
-        check('version'  in db, "No 'version' in YAML DB.")
-
-        # TODO: better version checking semantics.
-        version = Version(db['version'])
-        if version != _db_version:
-            raise InvalidDatabaseVersionError(_db_version, version)
+        installs = self._check_db_file(yfile)
 
         # Iterate through database and check each record.
-        installs = db['installs']
         data = {}
         for hash_key, rec in installs.items():
             try:
@@ -284,6 +524,56 @@ class Database(object):
         self._data = data
 
 
+    def _check_db_file(self, dbfile):
+        """Check the top-level structure of a loaded index file and
+           return its installs dict."""
+        def check(cond, msg):
+            if not cond: raise CorruptDatabaseError(self._index_path, msg)
+
+        check('database' in dbfile, "No 'database' attribute in index.")
+
+        # High-level file checks
+        db = dbfile['database']
+        check('installs' in db, "No 'installs' in DB index.")
+        check('version'  in db, "No 'version' in DB index.")
+
+        # TODO: better version checking semantics.
+        version = Version(db['version'])
+        if version != _db_version:
+            raise InvalidDatabaseVersionError(_db_version, version)
+
+        return db['installs']
+
+
+    def _read_from_json(self, stream):
+        """Fill database from a JSON index, do not maintain old data.
+
+        Unlike _read_from_yaml(), this does not build any specs.  Each
+        record's spec is built (and marked concrete) when it is first
+        used.  The JSON index is only ever written from records that
+        were already validated, so hashes are not checked again.
+
+        Does not do any locking.
+        """
+        try:
+            if isinstance(stream, basestring):
+                with open(stream, 'r') as f:
+                    jfile = json.load(f)
+            else:
+                jfile = json.load(stream)
+        except ValueError as e:
+            raise CorruptDatabaseError(self._index_path, str(e))
+
+        installs = _byteify(self._check_db_file(jfile))
+
+        def reader(hash_key):
+            return lambda: self._read_spec_from_yaml(hash_key, installs)
+
+        self._data = dict(
+            (hash_key, LazyInstallRecord(reader(hash_key), rec))
+            for hash_key, rec in installs.items())
+
+
     def reindex(self, directory_layout):
         """Build database index from scratch based from a directory layout.
 
@@ -346,8 +636,12 @@ class Database(object):
         # Write a temporary database file them move it into place
         try:
             with open(temp_file, 'w') as f:
-                self._write_to_yaml(f)
+                if self._index_format == 'json':
+                    self._write_to_json(f)
+                else:
+                    self._write_to_yaml(f)
             os.rename(temp_file, self._index_path)
+            self._index_key = self._index_key_for(self._index_path)
         except:
             # Clean up temp file if something goes wrong.
             if os.path.exists(temp_file):
@@ -355,14 +649,47 @@ class Database(object):
             raise
 
 
+    def _index_key_for(self, path):
+        """Key that changes whenever the index file at path changes.
+
+        The index is always replaced by renaming a new file over it.
+        That usually gives it a new inode, but the filesystem may reuse
+        the inode of the file it replaced once that is freed.  So the
+        key combines the inode with the mtime and size, and a rewrite
+        is only missed if all of them are unchanged.
+        """
+        st = os.stat(path)
+        return (path, st.st_dev, st.st_ino, st.st_mtime, st.st_size)
+
+
     def _read(self):
         """Re-read Database from the data in the set location.
 
+        If there are index files in more than one format, the most
+        recently written one is read.  Nothing is read if the index
+        has not changed since this process last read or wrote it.
+
         This does no locking.
         """
-        if os.path.isfile(self._index_path):
-            # Read from YAML file if a database exists
-            self._read_from_yaml(self._index_path)
+        indexes = [(os.path.getmtime(path), fmt == self._index_format, fmt)
+                   for fmt, path in self._index_paths.items()
+                   if os.path.isfile(path)]
+
+        if indexes:
+            # Read from the newest index file if a database exists,
+            # preferring the configured format if mtimes are equal.
+            mtime, selected, fmt = max(indexes)
+            path = self._index_paths[fmt]
+
+            key = self._index_key_for(path)
+            if key == self._index_key:
+                return
+
+            if fmt == 'json':
+                self._read_from_json(path)
+            else:
+                self._read_from_yaml(path)
+            self._index_key = key
 
         else:
             # The file doesn't exist, try to traverse the directory.
@@ -392,11 +719,32 @@ class Database(object):
             rec.path = path
 
         else:
-            self._data[key] = InstallRecord(spec, path, True)
+            self._add_record(key, InstallRecord(spec, path, True))
             for dep in spec.dependencies.values():
                 self._increment_ref_count(dep, directory_layout)
 
 
+    def _get_query_index(self):
+        """Get secondary indexes for the current data, building them
+           if _data has been replaced since they were built."""
+        if self._query_index_data is not self._data:
+            self._query_index = _QueryIndex(self._data)
+            self._query_index_data = self._data
+        return self._query_index
+
+
+    def _add_record(self, key, rec):
+        self._data[key] = rec
+        if self._query_index_data is self._data:
+            self._query_index.add(key, rec)
+
+
+    def _remove_record(self, key):
+        rec = self._data.pop(key)
+        if self._query_index_data is self._data:
+            self._query_index.remove(key, rec)
+
+
     def _increment_ref_count(self, spec, directory_layout=None):
         """Recursively examine dependencies and update their DB entries."""
         key = spec.dag_hash()
@@ -407,7 +755,7 @@ class Database(object):
                 path = directory_layout.path_for_spec(spec)
                 installed = os.path.isdir(path)
 
-            self._data[key] = InstallRecord(spec.copy(), path, installed)
+            self._add_record(key, InstallRecord(spec.copy(), path, installed))
 
             for dep in spec.dependencies.values():
                 self._increment_ref_count(dep)
@@ -456,7 +804,7 @@ class Database(object):
         rec.ref_count -= 1
 
         if rec.ref_count == 0 and not rec.installed:
-            del self._data[key]
+            self._remove_record(key)
             for dep in spec.dependencies.values():
                 self._decrement_ref_count(dep)
 
@@ -471,7 +819,7 @@ class Database(object):
             rec.installed = False
             return rec.spec
 
-        del self._data[key]
+        self._remove_record(key)
         for dep in rec.spec.dependencies.values():
             self._decrement_ref_count(dep)
 
@@ -497,6 +845,28 @@ class Database(object):
             return self._remove(spec)
 
 
+    @_autospec
+    def installed_dependents(self, spec):
+        """Return the specs of all installed packages that depend on
+           spec, directly or indirectly.
+
+        This follows the reverse dependency edges in the DB's index, so
+        it only looks at records that actually depend on spec.
+        """
+        with self.read_transaction():
+            index = self._get_query_index()
+            found = set()
+            stack = [spec.dag_hash()]
+            while stack:
+                for key in index.dependents(stack.pop()):
+                    if key not in found:
+                        found.add(key)
+                        stack.append(key)
+
+            return sorted(self._data[key].spec for key in found
+                          if self._data[key].installed)
+
+
     @_autospec
     def installed_extensions_for(self, extendee_spec):
         """
@@ -548,13 +918,29 @@ class Database(object):
               these really special cases that only belong here?
 
         """
+        if isinstance(query_spec, basestring):
+            query_spec = Spec(query_spec)
+
         with self.read_transaction():
+            # Use the secondary indexes to skip records that cannot
+            # match, without building their specs.
+            keys = None
+            if query_spec is not any:
+                keys = self._get_query_index().candidates(query_spec)
+            if keys is None:
+                keys = self._data.keys()
+
+            exists = {}
             results = []
-            for key, rec in self._data.items():
+            for key in keys:
+                rec = self._data[key]
                 if installed is not any and rec.installed != installed:
                     continue
-                if known is not any and spack.repo.exists(rec.spec.name) != known:
-                    continue
+                if known is not any:
+                    if rec.name not in exists:
+                        exists[rec.name] = spack.repo.exists(rec.name)
+                    if exists[rec.name] != known:
+                        continue
                 if query_spec is any or rec.spec.satisfies(query_spec):
                     results.append(rec.spec)
 
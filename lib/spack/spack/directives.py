@@ -231,8 +231,8 @@ def provides(pkg, *specs, **kwargs):
     spec_string = kwargs.get('when', pkg.name)
     provider_spec = parse_anonymous_spec(spec_string, pkg.name)
 
-    for string in specs:
-        for provided_spec in spack.spec.parse(string):
+    for spec_list in spack.spec.parse_many(specs):
+        for provided_spec in spec_list:
             if pkg.name == provided_spec.name:
                 raise CircularReferenceError('depends_on', pkg.name)
             pkg.provided[provided_spec] = provider_spec
@@ -0,0 +1,182 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Local cache of downloaded source archives.
+
+Archives are stored by checksum, in ``<root>/<algorithm>/<digest>``,
+so a tarball is only downloaded once no matter how many stages use
+it.  Only archives that passed their checksum are stored, and a cached
+archive is linked into a stage instead of being downloaded again.
+
+The cache is limited in size.  When it grows past its limit, the
+least recently used archives are removed.
+"""
+import os
+import errno
+import shutil
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import mkdirp
+
+import spack.util.crypto as crypto
+
+
+class DownloadCache(object):
+    def __init__(self, root, max_size=None):
+        """Create a download cache in the directory ``root``.
+
+        If ``max_size`` (in bytes) is given, least recently used
+        archives are removed when the cache grows larger than that.
+        """
+        self.root = root
+        self.max_size = max_size
+
+
+    def path_for(self, digest):
+        """Path where the archive with this digest is cached."""
+        algo = crypto.Checker(digest).hash_name
+        return os.path.join(self.root, algo, digest)
+
+
+    def fetch(self, digest, dest):
+        """Link the archive with this digest to ``dest``.
+
+        Returns True if the archive was in the cache, False if not.
+        """
+        path = self.path_for(digest)
+        if not os.path.isfile(path):
+            return False
+
+        try:
+            _link_or_copy(path, dest)
+        except (IOError, OSError), e:
+            # Another process may have pruned the archive.
+            if e.errno != errno.ENOENT:
+                raise
+            return False
+
+        # Mark the archive as recently used.  The archive may belong to
+        # another user, in which case it just ages out sooner.
+        try:
+            os.utime(path, None)
+        except OSError, e:
+            tty.debug("Could not mark %s as used: %s" % (path, e))
+        return True
+
+
+    def store(self, digest, path):
+        """Add the archive at ``path``, which has this digest, to the
+           cache.  The caller is responsible for checking the digest."""
+        dest = self.path_for(digest)
+        if os.path.isfile(dest):
+            return
+
+        mkdirp(os.path.dirname(dest))
+        tmp = '%s.%d.tmp' % (dest, os.getpid())
+        try:
+            # Copy rather than link, so that making the cached archive
+            # read-only doesn't change the stage's archive too.  Stages
+            # that later use the cache hold links to it, so make sure
+            # they can't modify it.
+            shutil.copy(path, tmp)
+            os.chmod(tmp, 0444)
+            os.rename(tmp, dest)
+        except (IOError, OSError), e:
+            # The cache is only an optimization.
+            tty.debug("Could not cache %s: %s" % (path, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        if self.max_size is not None:
+            self.prune(self.max_size)
+
+
+    def entries(self):
+        """List (path, size, last use time) for each cached archive."""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        # Other processes may add and remove archives while this runs,
+        # so skip anything that disappears or isn't what it should be.
+        for algo in os.listdir(self.root):
+            algo_dir = os.path.join(self.root, algo)
+            try:
+                names = os.listdir(algo_dir)
+            except OSError, e:
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    raise
+                continue
+
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(algo_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError, e:
+                    if e.errno != errno.ENOENT:
+                        raise
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+
+    def size(self):
+        """Total size in bytes of all cached archives."""
+        return sum(size for path, size, mtime in self.entries())
+
+
+    def prune(self, max_size):
+        """Remove least recently used archives until the cache is no
+           larger than ``max_size`` bytes."""
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for path, size, mtime in entries)
+        for path, size, mtime in entries:
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError, e:
+                # Another process pruned it first.
+                if e.errno != errno.ENOENT:
+                    raise
+            total -= size
+
+
+    def destroy(self):
+        """Remove all cached archives."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _link_or_copy(src, dest):
+    """Hard link src to dest, or copy it if they are on different
+       filesystems or the filesystem does not support links."""
+    try:
+        os.link(src, dest)
+    except OSError, e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copy(src, dest)
@@ -45,6 +45,8 @@ import sys
 import re
 import shutil
 import copy
+import hashlib
+import subprocess
 from functools import wraps
 import llnl.util.tty as tty
 from llnl.util.filesystem import *
@@ -146,6 +148,15 @@ class URLFetchStrategy(FetchStrategy):
 
         self.expand_archive = kwargs.get('expand', True)
 
+        # Names of hashlib algorithms to compute while downloading, in
+        # addition to the one needed to check the digest.
+        self.hashes = kwargs.get('hashes', [])
+
+        # Hex digests of the last downloaded archive, by algorithm name,
+        # and the (path, size, mtime) of the archive they belong to.
+        self.digests = {}
+        self._digested_file = None
+
         if not self.url:
             raise ValueError("URLFetchStrategy requires a url for fetching.")
 
@@ -159,9 +170,15 @@ class URLFetchStrategy(FetchStrategy):
 
         tty.msg("Trying to fetch from %s" % self.url)
 
-        curl_args = ['-O',  # save file to disk
-                     '-f',  # fail on >400 errors
-                     '-D', '-',  # print out HTML headers
+        # Curl writes the archive to a pipe, and it is hashed as it is
+        # written to a partial file, so it never has to be read back to
+        # be checked.  It is only moved into the stage if it is good.
+        save_file = os.path.join(self.stage.path, os.path.basename(self.url))
+        partial_file = save_file + '.part'
+        headers_file = save_file + '.headers'
+
+        curl_args = ['-f',  # fail on >400 errors
+                     '-D', headers_file,  # save HTML headers
                      '-L', self.url, ]
 
         if sys.stdout.isatty():
@@ -169,21 +186,50 @@ class URLFetchStrategy(FetchStrategy):
         else:
             curl_args.append('-sS')  # just errors when not.
 
-        # Run curl but grab the mime type from the http headers
-        headers = spack.curl(
-            *curl_args, output=str, fail_on_error=False)
-
-        if spack.curl.returncode != 0:
+        # hashlib calls md5 'MD5', so use lower case names throughout.
+        checker = crypto.Checker(self.digest) if self.digest else None
+        hash_names = set(name.lower() for name in self.hashes)
+        if checker:
+            hash_names.add(checker.hash_name.lower())
+        hashers = dict((name, hashlib.new(name)) for name in hash_names)
+
+        self.digests = {}
+        self._digested_file = None
+        try:
+            with open(partial_file, 'wb') as archive:
+                curl = subprocess.Popen(spack.curl.exe + curl_args,
+                                        stdout=subprocess.PIPE)
+                while True:
+                    data = curl.stdout.read(crypto.default_block_size)
+                    if not data:
+                        break
+                    archive.write(data)
+                    for hasher in hashers.values():
+                        hasher.update(data)
+                returncode = curl.wait()
+
+            headers = ''
+            if os.path.exists(headers_file):
+                with open(headers_file) as f:
+                    headers = f.read()
+        except:
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+            raise
+        finally:
+            if os.path.exists(headers_file):
+                os.remove(headers_file)
+
+        if returncode != 0:
             # clean up archive on failure.
-            if self.archive_file:
-                os.remove(self.archive_file)
+            os.remove(partial_file)
 
-            if spack.curl.returncode == 22:
+            if returncode == 22:
                 # This is a 404.  Curl will print the error.
                 raise FailedDownloadError(
                         self.url, "URL %s was not found!" % self.url)
 
-            elif spack.curl.returncode == 60:
+            elif returncode == 60:
                 # This is a certificate error.  Suggest spack -k
                 raise FailedDownloadError(
                         self.url,
@@ -197,20 +243,56 @@ class URLFetchStrategy(FetchStrategy):
                 # This is some other curl error.  Curl will print the
                 # error, but print a spack message too
                 raise FailedDownloadError(
-                        self.url, "Curl failed with error %d" % spack.curl.returncode)
+                        self.url, "Curl failed with error %d" % returncode)
 
         # Check if we somehow got an HTML file rather than the archive we
         # asked for.  We only look at the last content type, to handle
         # redirects properly.
         content_types = re.findall(r'Content-Type:[^\r\n]+', headers)
-        if content_types and 'text/html' in content_types[-1]:
-            tty.warn("The contents of " + self.archive_file + " look like HTML.",
-                     "The checksum will likely be bad.  If it is, you can use",
-                     "'spack clean <package>' to remove the bad archive, then fix",
-                     "your internet gateway issue and install again.")
+        looks_like_html = content_types and 'text/html' in content_types[-1]
+
+        # With checksums disabled (spack install -n), a mismatch is not
+        # an error.  The digests are still kept for check().
+        digests = dict((name, h.hexdigest()) for name, h in hashers.items())
+        if (checker and spack.do_checksum and
+            digests[checker.hash_name.lower()] != self.digest):
+            os.remove(partial_file)
+            long_msg = "Expected %s but got %s" % (
+                self.digest, digests[checker.hash_name.lower()])
+            if looks_like_html:
+                long_msg += ".  The server sent HTML; check your internet gateway."
+            raise ChecksumError(
+                    "%s checksum failed for %s" % (checker.hash_name, self.url),
+                    long_msg)
+
+        if looks_like_html:
+            tty.warn("The contents of " + save_file + " look like HTML.",
+                     "If the checksum is bad, you can use 'spack clean <package>'",
+                     "to remove the bad archive, then fix your internet gateway",
+                     "issue and install again.")
 
+        os.rename(partial_file, save_file)
+        self.digests = digests
+        self._digested_file = self._file_id(save_file)
+
+    def _file_id(self, path):
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime)
+
+    @_needs_stage
+    def archive_digest(self, hash_name):
+        """Hex digest of the archive with the named hashlib algorithm.
+           Uses the digest computed while downloading if there is one,
+           and reads the archive otherwise."""
         if not self.archive_file:
-            raise FailedDownloadError(self.url)
+            raise NoArchiveFileError("Cannot compute a digest before fetching.")
+
+        hash_name = hash_name.lower()
+
+        if (hash_name in self.digests and
+            self._digested_file == self._file_id(self.archive_file)):
+            return self.digests[hash_name]
+        return crypto.checksum(getattr(hashlib, hash_name), self.archive_file)
 
     @property
     def archive_file(self):
@@ -278,7 +360,8 @@ class URLFetchStrategy(FetchStrategy):
             raise NoDigestError("Attempt to check URLFetchStrategy with no digest.")
 
         checker = crypto.Checker(self.digest)
-        if not checker.check(self.archive_file):
+        checker.sum = self.archive_digest(checker.hash_name)
+        if checker.sum != self.digest:
             raise ChecksumError(
                     "%s checksum failed for %s" % (checker.hash_name, self.archive_file),
                     "Expected %s but got %s" % (self.digest, checker.sum))
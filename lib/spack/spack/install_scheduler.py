@@ -0,0 +1,239 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Concurrent, DAG-aware installation of packages.
+
+``Package.do_install()`` normally installs dependencies one at a time,
+depth first.  The ``InstallScheduler`` here instead walks the DAG in
+topological order and builds every package whose dependencies are
+already installed at the same time, each in its own build process
+forked by ``spack.build_environment.fork()``.
+
+A global budget of make jobs (``make_jobs``, or the number of CPUs)
+is split among the builds that are running at any one time.
+
+The scheduler holds the prefix lock of each package while it is being
+built (see ``Database.prefix_lock()``).  Packages that another process
+is already building are skipped until that process is done with them.
+
+"""
+import os
+import sys
+import signal
+import multiprocessing
+
+import llnl.util.tty as tty
+from llnl.util.lock import LockError
+from llnl.util.tty.log import keyboard_input
+
+import spack
+from spack.build_environment import InstallError
+from spack.graph import topological_sort
+from spack.util.multiproc import wait_for_any
+
+
+class InstallScheduler(object):
+    def __init__(self, spec, **kwargs):
+        """Create a scheduler for the concrete spec DAG ``spec``.
+
+        Options:
+        parallel_packages -- Max number of packages to build at once.
+        make_jobs   -- Total make jobs shared by all running builds.
+                       Default is the number of CPUs.
+        keep_going  -- If False (default), stop all builds at the first
+                       failure.  If True, keep building packages that
+                       do not depend on the failed one.
+
+        keep_prefix, keep_stage, skip_patch, verbose, and fake are
+        passed along to each build as in ``Package.do_install()``.
+        """
+        if not spec.concrete:
+            raise ValueError("Can only install concrete packages.")
+
+        self.spec = spec
+        self.parallel_packages = max(1, kwargs.get('parallel_packages', 1))
+        self.total_jobs = kwargs.get('make_jobs') or multiprocessing.cpu_count()
+        self.keep_going = kwargs.get('keep_going', False)
+
+        self.build_args = dict(
+            (k, kwargs.get(k, False)) for k in
+            ('keep_prefix', 'keep_stage', 'skip_patch', 'verbose', 'fake'))
+
+        # Map from pid of each running build to (spec, make jobs).
+        self.running = {}
+
+        # Names of packages that are installed, failed, or never started.
+        self.done    = set()
+        self.failed  = []
+        self.skipped = []
+
+
+    def install(self, root=True):
+        """Install all packages in the DAG, dependencies first.
+
+        If root is False, only the dependencies of the root are built.
+        Raises InstallError if any build fails.
+        """
+        nodes = self.spec.index()
+        if not root:
+            del nodes[self.spec.name]
+
+        # Topological order, leaves first, decides which ready
+        # packages are started first.  Whether a package is already
+        # installed is only checked once its prefix lock is held.
+        pending = [name for name in topological_sort(self.spec, reverse=True)
+                   if name in nodes]
+
+        # Builds share the terminal; set it up once here rather than
+        # letting each build save and restore it.
+        with keyboard_input(sys.stdin):
+            while pending or self.running:
+                progress = self._start_ready(nodes, pending)
+                if self.running:
+                    self._wait_for_build()
+                elif not progress:
+                    break
+
+        if self.failed:
+            msg = "Failed to install %s" % ", ".join(self.failed)
+            if self.skipped:
+                msg += ".  Skipped dependents: %s" % ", ".join(self.skipped)
+            raise InstallError(msg)
+
+
+    def _start_ready(self, nodes, pending):
+        """Fork builds for pending packages whose dependencies are done,
+           up to parallel_packages builds at once.
+
+           Returns True if any pending package was started, found
+           installed, or skipped.
+        """
+        num_pending = len(pending)
+        ready = []
+        for name in list(pending):
+            deps = nodes[name].dependencies
+            if any(d in self.failed or d in self.skipped for d in deps):
+                pending.remove(name)
+                self.skipped.append(name)
+            elif all(d in self.done for d in deps):
+                ready.append(name)
+
+        if self.failed and not self.keep_going:
+            return False
+
+        locked = []
+        for i, name in enumerate(ready):
+            slots = self.parallel_packages - len(self.running)
+            if slots <= 0:
+                break
+
+            # Don't wait for packages another process is building.
+            spec = nodes[name]
+            try:
+                spack.installed_db.prefix_lock(spec).acquire_write(0)
+            except LockError:
+                locked.append(spec)
+                continue
+
+            # Split what is left of the job budget among builds
+            # starting now.
+            used = sum(jobs for s, jobs in self.running.values())
+            share = max(1, (self.total_jobs - used) // min(slots, len(ready) - i))
+            self._start(spec, share, pending)
+
+        # If there is nothing else to do, wait for another process to
+        # finish with one of the packages it holds.
+        if locked and not self.running:
+            spec = locked[0]
+            tty.msg("Waiting for another process to install %s" % spec.name)
+            spack.installed_db.prefix_lock(spec).acquire_write(None)
+            self._start(spec, self.total_jobs, pending)
+
+        return len(pending) < num_pending
+
+
+    def _start(self, spec, make_jobs, pending):
+        """Fork a build for spec, whose prefix lock is held, unless
+           another process installed it in the meantime."""
+        pkg = spec.package
+        pending.remove(spec.name)
+        if not pkg._needs_install():
+            self._release(spec)
+            self.done.add(spec.name)
+            return
+
+        pkg.make_jobs = make_jobs if pkg.parallel else 1
+
+        tty.msg("Installing %s" % pkg.name)
+        try:
+            pid = pkg._fork_install(wait=False, **self.build_args)
+        except Exception, e:
+            tty.error("Could not start build of %s: %s" % (spec.name, e))
+            self._release(spec)
+            self._build_failed(spec)
+            return
+        self.running[pid] = (spec, pkg.make_jobs)
+
+
+    def _release(self, spec):
+        spack.installed_db.prefix_lock(spec).release_write()
+
+
+    def _wait_for_build(self):
+        """Wait for any running build to finish and record the result."""
+        pid, status = wait_for_any(list(self.running))
+        spec, jobs = self.running.pop(pid)
+        pkg = spec.package
+        try:
+            if status == 0:
+                pkg._register_install()
+                self.done.add(spec.name)
+            else:
+                pkg._cleanup_failed_install(self.build_args['keep_prefix'])
+                self._build_failed(spec)
+        finally:
+            self._release(spec)
+
+
+    def _build_failed(self, spec):
+        self.failed.append(spec.name)
+        if not self.keep_going:
+            self._stop_all()
+
+
+    def _stop_all(self):
+        """Terminate all running builds (fail-fast mode)."""
+        for pid in self.running:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+        for pid, (spec, jobs) in self.running.items():
+            os.waitpid(pid, 0)
+            tty.warn("Stopped build of %s" % spec.name)
+            spec.package._cleanup_failed_install(self.build_args['keep_prefix'])
+            self._release(spec)
+            self.skipped.append(spec.name)
+        self.running.clear()
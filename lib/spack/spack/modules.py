@@ -118,7 +118,7 @@ class EnvModule(object):
     class __metaclass__(type):
         def __init__(cls, name, bases, dict):
             type.__init__(cls, name, bases, dict)
-            if cls.name != 'env_module' and cls.name in CONFIGURATION['enable']:
+            if cls.name != 'env_module' and cls.name in CONFIGURATION.get('enable', ()):
                 module_types[cls.name] = cls
 
     def __init__(self, spec=None):
@@ -48,11 +48,19 @@ import functools
 import collections
 
 from llnl.util.lang import *
+import llnl.util.tty as tty
 
 import spack.architecture
 import spack.error
 from spack.spec import parse_anonymous_spec, Spec
 
+# Counts of multi-method calls, of calls whose method came from the
+# dispatch cache, and of satisfies() checks done to pick a method.
+# Package authors can look at these to see what dispatch costs.
+dispatch_stats = { 'calls'       : 0,
+                   'cache_hits'  : 0,
+                   'satisfies'   : 0 }
+
 
 class SpecMultiMethod(object):
     """This implements a multi-method for Spack specs.  Packages are
@@ -85,13 +93,15 @@ class SpecMultiMethod(object):
 
        When the mm is actually called, it selects a version of the
        method to call based on the sys_type of the object it is
-       called on.
+       called on.  Concrete specs don't change, so the method
+       selected for a concrete spec is cached by its DAG hash.
 
        See the docs for decorators below for more details.
     """
     def __init__(self, default=None):
         self.method_list = []
         self.default = default
+        self.dispatch_cache = {}
         if default:
             functools.update_wrapper(self, default)
 
@@ -99,6 +109,7 @@ class SpecMultiMethod(object):
     def register(self, spec, method):
         """Register a version of a method for a particular sys_type."""
         self.method_list.append((spec, method))
+        self.dispatch_cache.clear()
 
         if not hasattr(self, '__name__'):
             functools.update_wrapper(self, method)
@@ -116,16 +127,35 @@ class SpecMultiMethod(object):
            package's spec.  If none is found, call the default
            or if there is none, then raise a NoSuchMethodError.
         """
-        for spec, method in self.method_list:
-            if package_self.spec.satisfies(spec):
-                return method(package_self, *args, **kwargs)
+        dispatch_stats['calls'] += 1
+        pkg_spec = package_self.spec
 
-        if self.default:
-            return self.default(package_self, *args, **kwargs)
+        key = pkg_spec.dag_hash() if pkg_spec.concrete else None
+        if key in self.dispatch_cache:
+            dispatch_stats['cache_hits'] += 1
+            method = self.dispatch_cache[key]
         else:
+            method = self._resolve(pkg_spec)
+            if key is not None:
+                self.dispatch_cache[key] = method
+
+        if method is None:
             raise NoSuchMethodError(
-                type(package_self), self.__name__, spec,
+                type(package_self), self.__name__, pkg_spec,
                 [m[0] for m in self.method_list])
+        return method(package_self, *args, **kwargs)
+
+
+    def _resolve(self, pkg_spec):
+        """Get the method to call for pkg_spec, or None if there
+           isn't one."""
+        for spec, method in self.method_list:
+            dispatch_stats['satisfies'] += 1
+            if pkg_spec.satisfies(spec):
+                tty.debug("%s: dispatching %s() to @when('%s')"
+                          % (pkg_spec.name, self.__name__, spec))
+                return method
+        return self.default
 
 
     def __str__(self):
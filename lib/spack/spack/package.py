@@ -47,7 +47,9 @@ import spack.directives
 import spack.error
 import spack.fetch_strategy as fs
 import spack.hooks
+import spack.install_scheduler
 import spack.mirror
+import spack.prefetch
 import spack.repository
 import spack.url
 import spack.util.web
@@ -634,18 +636,8 @@ class Package(object):
     @property
     def installed_dependents(self):
         """Return a list of the specs of all installed packages that depend
-           on this one.
-
-        TODO: move this method to database.py?
-        """
-        dependents = []
-        for spec in spack.installed_db.query():
-            if self.name == spec.name:
-                continue
-            for dep in spec.traverse():
-                if self.spec == dep:
-                    dependents.append(spec)
-        return dependents
+           on this one."""
+        return spack.installed_db.installed_dependents(self.spec)
 
 
     @property
@@ -832,7 +824,8 @@ class Package(object):
 
     def do_install(self,
                    keep_prefix=False,  keep_stage=False, ignore_deps=False,
-                   skip_patch=False, verbose=False, make_jobs=None, fake=False):
+                   skip_patch=False, verbose=False, make_jobs=None, fake=False,
+                   parallel_packages=1, keep_going=False, fetch_jobs=1):
         """Called by commands to install a package and its dependencies.
 
         Package implementations should override install() to describe
@@ -848,32 +841,70 @@ class Package(object):
         skip_patch  -- Skip patch stage of build if True.
         verbose     -- Display verbose build output (by default, suppresses it)
         make_jobs   -- Number of make jobs to use for install.  Default is ncpus.
+        parallel_packages -- Number of dependencies to build concurrently.
+                       make_jobs is split among the concurrent builds.
+        keep_going  -- When building dependencies concurrently, keep
+                       building independent packages after a failure.
+        fetch_jobs  -- Number of sources to download at once before
+                       building.  Default is 1 (fetch as needed).
         """
         if not self.spec.concrete:
             raise ValueError("Can only install concrete packages.")
 
+        # Lock the prefix so that other processes installing the same
+        # spec wait for this install, and then find it installed.
+        with spack.installed_db.prefix_write_lock(self.spec):
+            if not self._needs_install():
+                return
+
+            tty.msg("Installing %s" % self.name)
+
+            # Download sources for the whole DAG up front if asked to.
+            if fetch_jobs > 1 and not fake and not ignore_deps:
+                spack.prefetch.prefetch([self.spec], jobs=fetch_jobs)
+
+            # First, install dependencies recursively.
+            if not ignore_deps:
+                self.do_install_dependencies(
+                    keep_prefix=keep_prefix, keep_stage=keep_stage, ignore_deps=ignore_deps,
+                    fake=fake, skip_patch=skip_patch, verbose=verbose, make_jobs=make_jobs,
+                    parallel_packages=parallel_packages, keep_going=keep_going)
+
+            # Set parallelism before starting build.
+            self.make_jobs = make_jobs
+
+            # Then install the package itself.
+            self._fork_install(keep_prefix=keep_prefix, keep_stage=keep_stage,
+                               skip_patch=skip_patch, verbose=verbose, fake=fake)
+            self._register_install()
+
+
+    def _needs_install(self):
+        """True if this package still has to be built, False if it is
+           external or already installed."""
         # No installation needed if package is external
         if self.spec.external:
             tty.msg("%s is externally installed in %s" % (self.name, self.spec.external))
-            return
+            return False
 
         # Ensure package is not already installed
         if spack.install_layout.check_installed(self.spec):
             tty.msg("%s is already installed in %s" % (self.name, self.prefix))
-            return
+            return False
 
-        tty.msg("Installing %s" % self.name)
+        return True
 
-        # First, install dependencies recursively.
-        if not ignore_deps:
-            self.do_install_dependencies(
-                keep_prefix=keep_prefix, keep_stage=keep_stage, ignore_deps=ignore_deps,
-                fake=fake, skip_patch=skip_patch, verbose=verbose, make_jobs=make_jobs)
 
-        # Set parallelism before starting build.
-        self.make_jobs = make_jobs
+    def _fork_install(self, keep_prefix=False, keep_stage=False,
+                      skip_patch=False, verbose=False, fake=False, wait=True):
+        """Create the install prefix and fork a build process for this package.
 
-        # Then install the package itself.
+        If wait is False, return the pid of the build process without
+        waiting for it.  The caller must then reap the process and
+        call either _register_install() or _cleanup_failed_install().
+
+        The caller must hold the prefix lock for this package's spec.
+        """
         def build_process():
             """Forked for each build. Has its own process and python
                module space set up by build_environment.fork()."""
@@ -938,18 +969,26 @@ class Package(object):
         try:
             # Create the install prefix and fork the build process.
             spack.install_layout.create_install_directory(self.spec)
-            spack.build_environment.fork(self, build_process)
+            return spack.build_environment.fork(self, build_process, wait=wait)
         except:
-            # remove the install prefix if anything went wrong during install.
-            if not keep_prefix:
-                self.remove_prefix()
-            else:
-                tty.warn("Keeping install prefix in place despite error.",
-                         "Spack will think this package is installed. " +
-                         "Manually remove this directory to fix:",
-                         self.prefix, wrap=True)
+            self._cleanup_failed_install(keep_prefix)
             raise
 
+
+    def _cleanup_failed_install(self, keep_prefix=False):
+        """Remove the install prefix after a failed build, unless asked
+           to keep it."""
+        if not keep_prefix:
+            self.remove_prefix()
+        else:
+            tty.warn("Keeping install prefix in place despite error.",
+                     "Spack will think this package is installed. " +
+                     "Manually remove this directory to fix:",
+                     self.prefix, wrap=True)
+
+
+    def _register_install(self):
+        """Record a successful build in the database and run hooks."""
         # note: PARENT of the build process adds the new package to
         # the database, so that we don't need to re-read from file.
         spack.installed_db.add(self.spec, self.prefix)
@@ -981,6 +1020,14 @@ class Package(object):
 
 
     def do_install_dependencies(self, **kwargs):
+        # Build independent dependencies concurrently if asked to.
+        parallel_packages = kwargs.get('parallel_packages', 1)
+        if parallel_packages > 1:
+            scheduler = spack.install_scheduler.InstallScheduler(
+                self.spec, **kwargs)
+            scheduler.install(root=False)
+            return
+
         # Pass along paths of dependencies here
         for dep in self.spec.dependencies.values():
             dep.package.do_install(**kwargs)
@@ -1295,19 +1342,36 @@ class Package(object):
         return urls
 
 
-    def fetch_remote_versions(self):
+    def fetch_remote_versions(self, refresh=False):
         """Try to find remote versions of this package using the
-           list_url and any other URLs described in the package file."""
+           list_url and any other URLs described in the package file.
+
+           Versions found are cached in spack.remote_version_cache.
+           If refresh is True, they are fetched again even if they
+           are cached.
+        """
         if not self.all_urls:
             raise VersionFetchError(self.__class__)
 
+        cache = spack.remote_version_cache
+        if cache and not refresh:
+            versions = cache.get(self)
+            if versions is not None:
+                return versions
+
         try:
-            return spack.util.web.find_versions_of_archive(
+            versions = spack.util.web.find_versions_of_archive(
                 *self.all_urls, list_url=self.list_url, list_depth=self.list_depth)
         except spack.error.NoNetworkConnectionError as e:
             tty.die("Package.fetch_versions couldn't connect to:",
                     e.url, e.message)
 
+        # Finding nothing usually means the network is down, so don't
+        # remember that.
+        if cache and versions:
+            cache.put(self, versions)
+        return versions
+
 
     @property
     def rpath(self):
@@ -49,18 +49,45 @@ class Token:
                    (other.type, other.value))
 
 
+# Master regexes compiled for each lexicon, keyed by the lexicon's
+# regexes, so lexers with the same rules only compile them once.
+_master_regexes = {}
+
+
 class Lexer(object):
-    """Base class for Lexers that keep track of line numbers."""
+    """Base class for Lexers that keep track of line numbers.
+
+    The lexicon is a list of (regex, action) pairs.  The regexes are
+    combined into one master regex, and at each position in the input
+    the action for the first regex that matches is called with the
+    lexer and the matched text.  Actions return a token, or None to
+    drop the text.
+    """
     def __init__(self, lexicon):
-        self.scanner = re.Scanner(lexicon)
+        regexes = tuple(regex for regex, action in lexicon)
+        if regexes not in _master_regexes:
+            _master_regexes[regexes] = re.compile('|'.join(
+                '(?P<t%d>%s)' % (i, regex) for i, regex in enumerate(regexes)))
+        self.regex = _master_regexes[regexes]
+        self.actions = dict(('t%d' % i, action)
+                            for i, (regex, action) in enumerate(lexicon))
+        self.match = None
 
     def token(self, type, value=''):
-        return Token(type, value, self.scanner.match.start(0), self.scanner.match.end(0))
+        return Token(type, value, self.match.start(0), self.match.end(0))
 
     def lex(self, text):
-        tokens, remainder = self.scanner.scan(text)
-        if remainder:
-            raise LexError("Invalid character", text, text.index(remainder))
+        tokens = []
+        pos = 0
+        while pos < len(text):
+            self.match = self.regex.match(text, pos)
+            if not self.match or self.match.end() == pos:
+                raise LexError("Invalid character", text, pos)
+
+            token = self.actions[self.match.lastgroup](self, self.match.group())
+            if token is not None:
+                tokens.append(token)
+            pos = self.match.end()
         return tokens
 
 
@@ -0,0 +1,155 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Concurrent fetching of the sources for many packages.
+
+Fetching a large DAG one package at a time is dominated by download
+latency.  The ``Prefetcher`` here runs ``Package.do_fetch()`` for many
+packages at once, each in its own forked process, so all downloads,
+mirror fallbacks and checksum checks work as they do for a single
+fetch.  Fetched archives are left in each package's stage, where the
+normal install path finds them already downloaded.
+
+Prefetching is best effort.  Failed fetches are reported and left for
+the normal fetch, which will retry them and show the real error.
+"""
+import os
+from urlparse import urlparse
+
+import llnl.util.tty as tty
+
+import spack
+from spack.util.multiproc import wait_for_any
+
+
+class Prefetcher(object):
+    def __init__(self, packages, jobs=None, jobs_per_host=None):
+        """Create a prefetcher for a list of concrete packages.
+
+        Options:
+        jobs          -- Max number of concurrent fetches.  Default is
+                         spack.fetch_jobs.
+        jobs_per_host -- Max number of concurrent fetches from any one
+                         host.  Default is spack.fetch_jobs_per_host.
+        """
+        self.packages = packages
+        self.jobs = max(1, jobs or spack.fetch_jobs)
+        self.jobs_per_host = max(1, jobs_per_host or spack.fetch_jobs_per_host)
+
+        # Map from pid of each running fetch to (package, host).
+        self.running = {}
+
+        self.fetched = []
+        self.failed  = []
+
+
+    def fetch(self):
+        """Fetch all the packages, returning the ones that failed."""
+        pending = [pkg for pkg in self.packages if self._needs_fetch(pkg)]
+        total = len(pending)
+
+        while pending or self.running:
+            self._start_ready(pending)
+            self._wait_for_fetch()
+
+            done = len(self.fetched) + len(self.failed)
+            tty.msg("%d of %d fetches done" % (done, total))
+
+        for pkg in self.failed:
+            tty.warn("Could not prefetch %s.  Will retry." % pkg.spec.format('$_$@'))
+        return self.failed
+
+
+    def _needs_fetch(self, pkg):
+        """Fetches that would need to ask the user whether to skip the
+           checksum are left for the normal, interactive fetch."""
+        if pkg.spec.external:
+            return False
+        if spack.do_checksum and not pkg.version in pkg.versions:
+            return False
+        return True
+
+
+    def _host(self, pkg):
+        """Host the package's source is fetched from."""
+        url = getattr(pkg.fetcher[0], 'url', None)
+        return urlparse(url).netloc if url else None
+
+
+    def _start_ready(self, pending):
+        """Start fetches until all workers are busy, or until all
+           pending packages are from hosts that are already busy."""
+        for pkg in list(pending):
+            if len(self.running) >= self.jobs:
+                break
+
+            host = self._host(pkg)
+            busy = sum(1 for p, h in self.running.values() if h == host)
+            if host and busy >= self.jobs_per_host:
+                continue
+
+            pending.remove(pkg)
+            pid = self._fork_fetch(pkg)
+            self.running[pid] = (pkg, host)
+
+
+    def _fork_fetch(self, pkg):
+        """Fork a process that fetches one package quietly."""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Concurrent fetches would garble each other's
+                # output, so only the parent reports progress.
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, 1)
+                os.dup2(devnull, 2)
+
+                pkg.do_fetch()
+                os._exit(0)
+            except:
+                os._exit(1)
+        return pid
+
+
+    def _wait_for_fetch(self):
+        """Wait for any running fetch to finish and record the result."""
+        pid, status = wait_for_any(list(self.running))
+        pkg, host = self.running.pop(pid)
+        if status == 0:
+            self.fetched.append(pkg)
+        else:
+            self.failed.append(pkg)
+
+
+def prefetch(specs, jobs=None, jobs_per_host=None):
+    """Concurrently fetch the sources of all packages in the DAGs of
+       specs that are not installed yet."""
+    packages = {}
+    for spec in specs:
+        for s in spec.traverse():
+            if s.dag_hash() not in packages and not s.package.installed:
+                packages[s.dag_hash()] = s.package
+
+    if packages:
+        Prefetcher(packages.values(), jobs, jobs_per_host).fetch()
@@ -0,0 +1,133 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Cache of the versions of packages that are available remotely.
+
+Finding the remote versions of a package means spidering its
+``list_url`` pages, which is slow.  The versions found for each
+package are stored in ``<root>/<namespace>/<name>.json`` and reused
+until they are older than the cache's time to live, or until the
+package's URLs change.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import join_path, mkdirp
+
+import spack
+import spack.error
+from spack.version import Version
+from spack.util.multiproc import parmap
+
+
+class RemoteVersionCache(object):
+    def __init__(self, root, ttl=None):
+        """Create a remote version cache in the directory ``root``.
+
+        Cached versions older than ``ttl`` seconds are not used.  If
+        ``ttl`` is None, they are used until they are refreshed.
+        """
+        self.root = root
+        self.ttl = ttl
+
+
+    def path_for(self, pkg):
+        """Path where the remote versions of pkg are cached."""
+        return join_path(self.root, pkg.namespace, pkg.name + '.json')
+
+
+    def get(self, pkg):
+        """Cached dict of remote versions to URLs for pkg, or None if
+           there isn't a current one."""
+        path = self.path_for(pkg)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            if entry['key'] != _key(pkg):
+                return None
+            if self.ttl is not None and time.time() - entry['time'] > self.ttl:
+                return None
+            return dict((Version(v), str(url))
+                        for v, url in entry['versions'].items())
+
+        except Exception, e:
+            # The cache is only an optimization.
+            tty.debug("Could not read cached versions %s: %s" % (path, e))
+            return None
+
+
+    def put(self, pkg, versions):
+        """Cache versions, a dict of versions to URLs, for pkg."""
+        dest = self.path_for(pkg)
+        tmp = '%s.%d.tmp' % (dest, os.getpid())
+        entry = { 'key'      : _key(pkg),
+                  'time'     : time.time(),
+                  'versions' : dict((str(v), url) for v, url in versions.items()) }
+        try:
+            mkdirp(os.path.dirname(dest))
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp, dest)
+        except (IOError, OSError), e:
+            tty.debug("Could not cache versions of %s: %s" % (pkg.name, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+    def destroy(self):
+        """Remove all cached versions."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _key(pkg):
+    """Hash of the parts of pkg that determine its remote versions."""
+    urls = sorted(set(pkg.all_urls))
+    return hashlib.sha1(repr((urls, pkg.list_url, pkg.list_depth))).hexdigest()
+
+
+def fetch_remote_versions(packages, refresh=False, jobs=8):
+    """Fetch the remote versions of many packages in parallel.
+
+    Returns a list with a dict of versions to URLs for each package,
+    or None for packages whose versions could not be fetched.
+    Versions that are cached are not fetched again unless
+    ``refresh`` is True.
+    """
+    def fetch(pkg):
+        try:
+            return pkg.fetch_remote_versions(refresh=refresh)
+        except (Exception, SystemExit), e:
+            # One bad package shouldn't stop the others from being
+            # reported, whatever went wrong with it.
+            tty.debug("Could not fetch versions of %s: %s" % (pkg.name, e))
+            return None
+
+    return parmap(fetch, packages, jobs=jobs)
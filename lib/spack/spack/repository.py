@@ -28,9 +28,12 @@ import sys
 import inspect
 import imp
 import re
+import socket
+import hashlib
 import traceback
 from bisect import bisect_left
 from external import yaml
+from yaml.error import YAMLError
 
 import llnl.util.tty as tty
 from llnl.util.filesystem import *
@@ -225,7 +228,14 @@ class RepoPath(object):
     @_autospec
     def providers_for(self, vpkg_spec):
         if self._provider_index is None:
-            self._provider_index = ProviderIndex(self.all_package_names())
+            # Build the index from each repo's cached metadata so
+            # that we don't need to import every package.
+            index = ProviderIndex([])
+            for name in self.all_package_names():
+                repo = self.repo_for_pkg(name)
+                index.update(spack.spec.Spec(name),
+                             repo.package_index.provided(name))
+            self._provider_index = index
 
         providers = self._provider_index.providers_for(vpkg_spec)
         if not providers:
@@ -416,6 +426,7 @@ class Repo(object):
         self._instances = {}
         self._provider_index = None
         self._all_package_names = None
+        self._package_index = None
 
         # make sure the namespace for packages in this repo exists.
         self._create_namespace()
@@ -601,10 +612,22 @@ class Repo(object):
         self._instances.clear()
 
 
+    @property
+    def package_index(self):
+        """Persistent index of metadata for all packages in this repo."""
+        if self._package_index is None:
+            self._package_index = RepoIndex(self)
+        return self._package_index
+
+
     @_autospec
     def providers_for(self, vpkg_spec):
         if self._provider_index is None:
-            self._provider_index = ProviderIndex(self.all_package_names())
+            index = ProviderIndex([])
+            for name in self.all_package_names():
+                index.update(spack.spec.Spec(name),
+                             self.package_index.provided(name))
+            self._provider_index = index
 
         providers = self._provider_index.providers_for(vpkg_spec)
         if not providers:
@@ -749,6 +772,155 @@ class Repo(object):
         return self.exists(pkg_name)
 
 
+# Bump this when the format of RepoIndex entries changes.
+_repo_index_version = 2
+
+class RepoIndex(object):
+    """Persistent index of package metadata for one Repo.
+
+    Answering questions like "which packages provide mpi?" would
+    otherwise mean importing every ``package.py`` in the repository.
+    This keeps the metadata declared by directives (versions,
+    variants, dependencies, provided virtual packages, and extendees),
+    and the package's download URLs, in a YAML file under
+    ``spack.cache_path``.
+
+    Each entry is keyed by the mtime and size of its ``package.py``.
+    When the index is loaded, only packages whose files changed are
+    imported again, and the index file is rewritten if anything did.
+    """
+    def __init__(self, repo, cache_dir=None):
+        self.repo = repo
+
+        if cache_dir is None:
+            cache_dir = join_path(spack.cache_path, 'repos')
+        root_hash = hashlib.sha1(repo.root).hexdigest()[:8]
+        self.index_path = join_path(
+            cache_dir, '%s-%s.yaml' % (repo.namespace, root_hash))
+
+        # Map from package name to metadata; read lazily.
+        self._packages = None
+
+
+    @property
+    def packages(self):
+        if self._packages is None:
+            self._update()
+        return self._packages
+
+
+    def __getitem__(self, pkg_name):
+        return self.packages[pkg_name]
+
+
+    def __contains__(self, pkg_name):
+        return pkg_name in self.packages
+
+
+    def provided(self, pkg_name):
+        """Virtual packages provided by a package, as in
+           ``Package.provided``: a dict from provided spec to the
+           ``when`` spec under which it is provided."""
+        return dict((spack.spec.Spec(p), spack.spec.Spec(w))
+                    for p, w in self[pkg_name]['provided'])
+
+
+    def urls(self, pkg_name):
+        """The package's url and any URLs given to its versions."""
+        return self[pkg_name]['urls']
+
+
+    def dependencies(self, pkg_name):
+        """Dependencies of a package, as in ``Package.dependencies``."""
+        return dict(
+            (name, dict((spack.spec.Spec(w), spack.spec.Spec(d))
+                        for w, d in conditions))
+            for name, conditions in self[pkg_name]['dependencies'].items())
+
+
+    def _read(self):
+        """Read the index file, or return an empty index if there is
+           no usable one."""
+        try:
+            with open(self.index_path) as f:
+                data = yaml.load(f)
+            if data['index'].get('version') != _repo_index_version:
+                return {}
+            return data['index']['packages']
+        except (IOError, YAMLError, KeyError, TypeError):
+            return {}
+
+
+    def _write(self):
+        """Write the index to a temp file and move it into place.
+           Failure to write the cache is not an error."""
+        temp_file = self.index_path + (
+            '.%s.%s.temp' % (socket.getfqdn(), os.getpid()))
+        try:
+            mkdirp(os.path.dirname(self.index_path))
+            with open(temp_file, 'w') as f:
+                yaml.dump({ 'index' : { 'version'  : _repo_index_version,
+                                        'packages' : self._packages } },
+                          f, default_flow_style=False)
+            os.rename(temp_file, self.index_path)
+        except (IOError, OSError), e:
+            tty.debug("Could not write package index %s: %s"
+                      % (self.index_path, e))
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+    def _update(self):
+        """Read the index and refresh entries for changed packages."""
+        old = self._read()
+        self._packages = {}
+        changed = False
+
+        for pkg_name in self.repo.all_package_names():
+            st = os.stat(self.repo.filename_for_package_name(pkg_name))
+            entry = old.get(pkg_name)
+            if (not entry or entry.get('mtime') != st.st_mtime or
+                entry.get('size') != st.st_size):
+                entry = self._make_entry(pkg_name, st)
+                changed = True
+            self._packages[pkg_name] = entry
+
+        # Packages removed from the repo also change the index.
+        if changed or set(old) != set(self._packages):
+            self._write()
+
+
+    def _make_entry(self, pkg_name, st):
+        """Import a package and record its metadata."""
+        cls = self.repo.get_pkg_class(pkg_name)
+
+        versions     = getattr(cls, 'versions',     {})
+        variants     = getattr(cls, 'variants',     {})
+        dependencies = getattr(cls, 'dependencies', {})
+        provided     = getattr(cls, 'provided',     {})
+        extendees    = getattr(cls, 'extendees',    {})
+
+        urls = set(args['url'] for args in versions.values() if 'url' in args)
+        if getattr(cls, 'url', None):
+            urls.add(cls.url)
+
+        return {
+            'mtime'    : st.st_mtime,
+            'size'     : st.st_size,
+            'versions' : sorted(str(v) for v in versions),
+            'variants' : dict(
+                (name, { 'default'     : v.default,
+                         'description' : v.description })
+                for name, v in variants.items()),
+            'dependencies' : dict(
+                (name, sorted([str(w), str(d)] for w, d in conditions.items()))
+                for name, conditions in dependencies.items()),
+            'provided'  : sorted([str(p), str(w)] for p, w in provided.items()),
+            'extendees' : sorted(str(e) for e in extendees),
+            'urls'      : sorted(urls)
+        }
+
+
 def create_repo(root, namespace=None):
     """Create a new repository in root with the specified namespace.
 
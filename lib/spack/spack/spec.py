@@ -96,6 +96,7 @@ import hashlib
 import base64
 from StringIO import StringIO
 from operator import attrgetter
+from ordereddict_backport import OrderedDict
 import yaml
 from yaml.error import MarkedYAMLError
 
@@ -125,6 +126,20 @@ disabled_variant_color = '@r'
 dependency_color       = '@.'
 hash_color             = '@K'
 
+# Counts of the work done by Spec.concretize(): rounds of its main
+# loop, and nodes visited when normalizing, when expanding virtual
+# packages and when concretizing versions, compilers, etc.
+concretize_stats = { 'passes'            : 0,
+                     'normalize_visits'  : 0,
+                     'virtual_visits'    : 0,
+                     'concretize_visits' : 0 }
+
+# Strings parsed into specs are cached, since the same strings are
+# parsed over and over by directives, multimethods and preferences.
+# This many of the most recently used strings are kept.
+_parse_cache_size = 1024
+_parse_cache = OrderedDict()
+
 """This map determines the coloring of specs when using color output.
    We make the fields different colors to enhance readability.
    See spack.color for descriptions of the color codes. """
@@ -181,6 +196,8 @@ class CompilerSpec(object):
     """The CompilerSpec field represents the compiler or range of compiler
        versions that a package should be built with.  CompilerSpecs have a
        name and a version list. """
+    __slots__ = ('name', 'versions')
+
     def __init__(self, *args):
         nargs = len(args)
         if nargs == 1:
@@ -188,7 +205,7 @@ class CompilerSpec(object):
             # If there is one argument, it's either another CompilerSpec
             # to copy or a string to parse
             if isinstance(arg, basestring):
-                c = SpecParser().parse_compiler(arg)
+                c = parse_compiler(arg)
                 self.name = c.name
                 self.versions = c.versions
 
@@ -212,6 +229,10 @@ class CompilerSpec(object):
                 "__init__ takes 1 or 2 arguments. (%d given)" % nargs)
 
 
+    def __reduce__(self):
+        return (CompilerSpec, (str(self),))
+
+
     def _add_version(self, version):
         self.versions.add(version)
 
@@ -296,11 +317,17 @@ class VariantSpec(object):
        on the particular package being built, and each named variant can
        be enabled or disabled.
     """
+    __slots__ = ('name', 'enabled')
+
     def __init__(self, name, enabled):
         self.name = name
         self.enabled = enabled
 
 
+    def __reduce__(self):
+        return (VariantSpec, (self.name, self.enabled))
+
+
     def _cmp_key(self):
         return (self.name, self.enabled)
 
@@ -383,6 +410,20 @@ class DependencyMap(HashableMap):
 
 @key_ordering
 class Spec(object):
+    # Specs are created in large numbers, e.g. for every record in the
+    # installed database, so they do not carry an instance dict.
+    # fc_link, cc_link and libraries are set by packages (e.g.
+    # netlib-scalapack) in setup_dependent_package() for their
+    # dependents to use.
+    __slots__ = ('name', 'namespace', 'versions', 'architecture', 'compiler',
+                 'variants', 'dependencies', 'dependents', 'external',
+                 '_normal', '_concrete', '_hash', '_cmp_key_cache',
+                 '_dep_names', '_node_orders',
+                 'fc_link', 'cc_link', 'libraries')
+
+    # Caches that are not pickled, and are rebuilt when needed.
+    _transient_slots = ('_cmp_key_cache', '_dep_names', '_node_orders')
+
     def __init__(self, spec_like, *dep_like, **kwargs):
         # Copy if spec_like is a Spec.
         if isinstance(spec_like, Spec):
@@ -393,7 +434,7 @@ class Spec(object):
         if not isinstance(spec_like, basestring):
             raise TypeError("Can't make spec out of %s" % type(spec_like))
 
-        spec_list = SpecParser().parse(spec_like)
+        spec_list = parse(spec_like)
         if len(spec_list) > 1:
             raise ValueError("More than one spec in string: " + spec_like)
         if len(spec_list) < 1:
@@ -421,6 +462,13 @@ class Spec(object):
         self._normal   = kwargs.get('normal', False)
         self._concrete = kwargs.get('concrete', False)
 
+        # Cached DAG hash and comparison key; only filled in for
+        # concrete specs.
+        self._hash = None
+        self._cmp_key_cache = None
+        self._dep_names = None
+        self._node_orders = None
+
         # Allow a spec to be constructed with an external path.
         self.external  = kwargs.get('external', None)
 
@@ -467,6 +515,7 @@ class Spec(object):
             raise DuplicateDependencyError("Cannot depend on '%s' twice" % spec)
         self.dependencies[spec.name] = spec
         spec.dependents[self.name] = self
+        self._clear_hash()
 
     #
     # Public interface
@@ -608,37 +657,94 @@ class Spec(object):
         validate('order',     order,     ('pre', 'post'))
 
         if visited is None:
+            # Concrete DAGs don't change, so the nodes of the most
+            # common traversal are cached on them.
+            if (direction == 'children' and cover == 'nodes' and
+                not depth and key_fun is id and d == 0 and self._concrete):
+                nodes = self._node_order(order)
+                if not yield_root:
+                    nodes = nodes[1:] if order == 'pre' else nodes[:-1]
+                return iter(nodes)
             visited = set()
-        key = key_fun(self)
 
-        # Node traversal does not yield visited nodes.
-        if key in visited and cover == 'nodes':
-            return
+        return self._traverse(visited, d, depth, key_fun, yield_root,
+                              cover, direction, order)
 
-        # Determine whether and what to yield for this node.
-        yield_me = yield_root or d > 0
-        result = (d, self) if depth else self
 
-        # Preorder traversal yields before successors
-        if yield_me and order == 'pre':
-            yield result
+    def _traverse(self, visited, d, depth, key_fun, yield_root,
+                  cover, direction, order):
+        """Iterative implementation of traverse().
 
-        # Edge traversal yields but skips children of visited nodes
-        if not (key in visited and cover == 'edges'):
-            # This code determines direction and yields the children/parents
-            successors = self.dependencies
-            if direction == 'parents':
-                successors = self.dependents
-
-            visited.add(key)
-            for name in sorted(successors):
-                child = successors[name]
-                for elt in child.traverse(visited, d+1, **kwargs):
-                    yield elt
-
-        # Postorder traversal yields after successors
-        if yield_me and order == 'post':
-            yield result
+        Each frame on the stack is a list of a node, its depth, its
+        successors, their sorted names, the index of the next one to
+        visit, and whether the node is yielded.  Successors are looked
+        up as they are reached, like a recursive traversal would.
+        """
+        preorder = (order == 'pre')
+        stack = []
+        node = self
+        while True:
+            if node is not None:
+                key = key_fun(node)
+                # Node traversal does not yield visited nodes.
+                if not (key in visited and cover == 'nodes'):
+                    yield_me = yield_root or d > 0
+                    if yield_me and preorder:
+                        yield (d, node) if depth else node
+
+                    # Edge traversal yields but skips children of
+                    # visited nodes.
+                    if key in visited and cover == 'edges':
+                        successors, names = None, ()
+                    elif direction == 'children':
+                        successors = node.dependencies
+                        names = node._sorted_dependency_names()
+                    else:
+                        successors = node.dependents
+                        names = sorted(successors)
+                    visited.add(key)
+                    stack.append([node, d, successors, names, 0, yield_me])
+                node = None
+
+            if not stack:
+                return
+
+            frame = stack[-1]
+            names = frame[3]
+            if frame[4] < len(names):
+                node = frame[2][names[frame[4]]]
+                frame[4] += 1
+                d = frame[1] + 1
+            else:
+                # Postorder traversal yields after successors.
+                stack.pop()
+                if frame[5] and not preorder:
+                    yield (frame[1], frame[0]) if depth else frame[0]
+
+
+    def _sorted_dependency_names(self):
+        """Sorted names of this spec's dependencies.  Cached for
+           concrete specs, and cleared by _clear_hash()."""
+        names = self._dep_names
+        if names is None:
+            names = tuple(sorted(self.dependencies))
+            if self._concrete and self._hash:
+                self._dep_names = names
+        return names
+
+
+    def _node_order(self, order):
+        """All nodes in this concrete spec's DAG, in the given order.
+           Cached, and cleared by _clear_hash()."""
+        nodes = self._node_orders and self._node_orders.get(order)
+        if nodes is None:
+            nodes = tuple(self._traverse(set(), 0, False, id, True,
+                                         'nodes', 'children', order))
+            if self._hash:
+                if self._node_orders is None:
+                    self._node_orders = {}
+                self._node_orders[order] = nodes
+        return nodes
 
 
     @property
@@ -663,19 +769,80 @@ class Spec(object):
     def dag_hash(self, length=None):
         """
         Return a hash of the entire spec DAG, including connectivity.
+
+        Hashes are computed bottom-up, so each node in the DAG is
+        dumped only once.  Concrete specs cache their hash; the cache
+        is filled in by _mark_concrete() and cleared by _clear_hash().
         """
+        if self._hash:
+            return self._hash[:length]
+
+        hashes = {}
+        for s in self.traverse(order='post'):
+            node_hash = s._hash
+            if not node_hash:
+                node_hash = s._node_hash(hashes)
+                if s._concrete and all(
+                        d._hash for d in s.dependencies.values()):
+                    s._hash = node_hash
+            hashes[id(s)] = node_hash
+
+        return hashes[id(self)][:length]
+
+
+    def _node_hash(self, hashes):
+        """Hash this node, looking up dependency hashes in ``hashes``."""
         yaml_text = yaml.dump(
-            self.to_node_dict(), default_flow_style=True, width=sys.maxint)
+            self._to_node_dict(hashes),
+            default_flow_style=True, width=sys.maxint)
         sha = hashlib.sha1(yaml_text)
-        return base64.b32encode(sha.digest()).lower()[:length]
+        return base64.b32encode(sha.digest()).lower()
+
+
+    def _has_cache(self):
+        """True if this spec holds any cached state."""
+        return not (self._hash is None and self._cmp_key_cache is None and
+                    self._dep_names is None and self._node_orders is None)
+
+
+    def _clear_hash(self):
+        """Invalidate cached hashes of this spec and everything that
+           depends on it.  Call this when a spec is modified.
+
+        A node only caches state once all of its dependencies have, so
+        the dependents of a node with no cached state have none either,
+        and the walk up the DAG stops there.  This keeps building a DAG
+        edge by edge linear.
+        """
+        stack = [self]
+        while stack:
+            s = stack.pop()
+            if not s._has_cache():
+                continue
+            s._hash = None
+            s._cmp_key_cache = None
+            s._dep_names = None
+            s._node_orders = None
+            stack.extend(s.dependents.values())
 
 
     def to_node_dict(self):
+        return self._to_node_dict()
+
+
+    def _to_node_dict(self, hashes=None):
+        """Helper for to_node_dict().  ``hashes`` optionally maps ids of
+           dependency specs to already-computed DAG hashes."""
+        def dep_hash(dep):
+            if hashes and id(dep) in hashes:
+                return hashes[id(dep)]
+            return dep.dag_hash()
+
         d = {
             'variants' : dict(
                 (name,v.enabled) for name, v in self.variants.items()),
             'arch' : self.architecture,
-            'dependencies' : dict((d, self.dependencies[d].dag_hash())
+            'dependencies' : dict((d, dep_hash(self.dependencies[d]))
                                   for d in sorted(self.dependencies))
         }
 
@@ -693,6 +860,9 @@ class Spec(object):
 
 
     def to_yaml(self, stream=None):
+        # Compute all hashes in one bottom-up pass first.
+        self.dag_hash()
+
         node_list = []
         for s in self.traverse(order='pre'):
             node = s.to_node_dict()
@@ -767,6 +937,7 @@ class Spec(object):
 
         if self.name in visited:
             return False
+        concretize_stats['concretize_visits'] += 1
 
         changed = False
 
@@ -798,6 +969,7 @@ class Spec(object):
         for name, dependent in self.dependents.items():
             # remove self from all dependents.
             del dependent.dependencies[self.name]
+            dependent._clear_hash()
 
             # add the replacement, unless it is already a dep of dependent.
             if concrete.name not in dependent.dependencies:
@@ -820,15 +992,20 @@ class Spec(object):
         for name, dep in self.dependencies.items():
             del dep.dependents[self.name]
             del self.dependencies[dep.name]
+        self._clear_hash()
 
 
-    def _expand_virtual_packages(self):
+    def _expand_virtual_packages(self, examined=None):
         """Find virtual packages in this spec, replace them with providers,
            and normalize again to include the provider's (potentially virtual)
            dependencies.  Repeat until there are no virtual deps.
 
            Precondition: spec is normalized.
 
+           If a dict is passed as ``examined``, nodes that it says were
+           already examined and have not changed since are skipped, and
+           it is updated with the nodes examined in this call.
+
            .. todo::
 
               If a provider depends on something that conflicts with
@@ -842,76 +1019,99 @@ class Spec(object):
         # Make an index of stuff this spec already provides
         self_index = ProviderIndex(self.traverse(), restrict=True)
 
+        # Nodes still to be examined, in traversal order.  Only nodes
+        # that are added or refined along the way are examined again.
+        if examined is None:
+            examined = {}
+        def state(spec):
+            return (spec._cmp_node(), spec.external)
+
+        worklist = [s for s in self.traverse()
+                    if id(s) not in examined or examined[id(s)][1] != state(s)]
+        worklist.reverse()
+
+        # Ids of the nodes in the DAG, recomputed when nodes are removed.
+        in_dag = None
+
         changed = False
-        done = False
-        while not done:
-            done = True
-            for spec in list(self.traverse()):
-                replacement = None
-                if spec.virtual:
-                    replacement = self._find_provider(spec, self_index)
-                    if replacement:
-                        # TODO: may break if in-place on self but
-                        # shouldn't happen if root is traversed first.
-                        spec._replace_with(replacement)
-                        done=False
+        while worklist:
+            spec = worklist.pop()
+            if in_dag is None:
+                in_dag = set(id(s) for s in self.traverse())
+            if id(spec) not in in_dag:
+                continue
+            concretize_stats['virtual_visits'] += 1
+            examined[id(spec)] = (spec, state(spec))
+
+            replacement = None
+            if spec.virtual:
+                replacement = self._find_provider(spec, self_index)
+                if replacement:
+                    # TODO: may break if in-place on self but
+                    # shouldn't happen if root is traversed first.
+                    spec._replace_with(replacement)
+                    in_dag = None
+                    continue
+
+            if not replacement:
+                # Get a list of possible replacements in order of preference.
+                candidates = spack.concretizer.choose_virtual_or_external(spec)
+
+                # Try the replacements in order, skipping any that cause
+                # satisfiability problems.  The last one is used if all
+                # the others fail, so there's no need to try it.
+                for i, replacement in enumerate(candidates):
+                    if replacement is spec or i == len(candidates) - 1:
                         break
 
-                if not replacement:
-                    # Get a list of possible replacements in order of preference.
-                    candidates = spack.concretizer.choose_virtual_or_external(spec)
-
-                    # Try the replacements in order, skipping any that cause
-                    # satisfiability problems.
-                    for replacement in candidates:
-                        if replacement is spec:
-                            break
-
-                        # Replace spec with the candidate and normalize
-                        copy = self.copy()
-                        copy[spec.name]._dup(replacement.copy(deps=False))
-
-                        try:
-                            # If there are duplicate providers or duplicate provider
-                            # deps, consolidate them and merge constraints.
-                            copy.normalize(force=True)
-                            break
-                        except SpecError as e:
-                            # On error, we'll try the next replacement.
-                            continue
-
-                # If replacement is external then trim the dependencies
-                if replacement.external:
-                    if (spec.dependencies):
-                        changed = True
-                        spec.dependencies = DependencyMap()
-                    replacement.dependencies = DependencyMap()
-
-                # TODO: could this and the stuff in _dup be cleaned up?
-                def feq(cfield, sfield):
-                    return (not cfield) or (cfield == sfield)
-
-                if replacement is spec or (feq(replacement.name, spec.name) and
-                    feq(replacement.versions, spec.versions) and
-                    feq(replacement.compiler, spec.compiler) and
-                    feq(replacement.architecture, spec.architecture) and
-                    feq(replacement.dependencies, spec.dependencies) and
-                    feq(replacement.variants, spec.variants) and
-                    feq(replacement.external, spec.external)):
-                    continue
+                    # Replace spec with the candidate and normalize
+                    copy = self.copy()
+                    copy[spec.name]._dup(replacement.copy(deps=False))
 
-                # Refine this spec to the candidate. This uses
-                # replace_with AND dup so that it can work in
-                # place. TODO: make this more efficient.
-                if spec.virtual:
-                    spec._replace_with(replacement)
-                    changed = True
-                if spec._dup(replacement, deps=False, cleardeps=False):
+                    try:
+                        # If there are duplicate providers or duplicate provider
+                        # deps, consolidate them and merge constraints.
+                        copy.normalize(force=True)
+                        break
+                    except SpecError as e:
+                        # On error, we'll try the next replacement.
+                        continue
+
+            # If replacement is external then trim the dependencies
+            if replacement.external:
+                if (spec.dependencies):
                     changed = True
+                    spec.dependencies = DependencyMap()
+                    in_dag = None
+                replacement.dependencies = DependencyMap()
+
+            # TODO: could this and the stuff in _dup be cleaned up?
+            def feq(cfield, sfield):
+                return (not cfield) or (cfield == sfield)
+
+            if replacement is spec or (feq(replacement.name, spec.name) and
+                feq(replacement.versions, spec.versions) and
+                feq(replacement.compiler, spec.compiler) and
+                feq(replacement.architecture, spec.architecture) and
+                feq(replacement.dependencies, spec.dependencies) and
+                feq(replacement.variants, spec.variants) and
+                feq(replacement.external, spec.external)):
+                continue
+
+            # Refine this spec to the candidate. This uses
+            # replace_with AND dup so that it can work in
+            # place. TODO: make this more efficient.
+            if spec.virtual:
+                spec._replace_with(replacement)
+                changed = True
+                in_dag = None
+                worklist.append(replacement)
+            else:
+                worklist.append(spec)
+            if spec._dup(replacement, deps=False, cleardeps=False):
+                changed = True
 
-                self_index.update(spec)
-                done=False
-                break
+            self_index.update(spec)
 
         return changed
 
@@ -932,15 +1132,40 @@ class Spec(object):
         if self._concrete:
             return
 
-        changed = True
+        # Use a cached concretization of this spec if there is one.
+        # Only whole DAGs are cached, not specs that have dependents.
+        cache = spack.concretization_cache
+        if cache and not self.dependents:
+            abstract = self.copy()
+            fingerprint = cache.fingerprint()
+            concrete = cache.fetch(abstract, fingerprint)
+            if concrete:
+                self._dup(concrete)
+                return
+
+        # Normalizing, expanding virtuals and concretizing nodes each
+        # need to be redone only when one of the others has changed the
+        # spec since they last ran.  Stop when they are all up to date.
+        normalized = expanded = concretized = False
         force = False
+        examined = {}
 
-        while changed:
-            changes = (self.normalize(force),
-                       self._expand_virtual_packages(),
-                       self._concretize_helper())
-            changed = any(changes)
-            force=True
+        while not (normalized and expanded and concretized):
+            concretize_stats['passes'] += 1
+            if not normalized:
+                if self.normalize(force):
+                    expanded = concretized = False
+                normalized = force = True
+
+            if not expanded:
+                if self._expand_virtual_packages(examined):
+                    normalized = concretized = False
+                expanded = True
+
+            if not concretized:
+                if self._concretize_helper():
+                    normalized = expanded = False
+                concretized = True
 
         for s in self.traverse():
             # After concretizing, assign namespaces to anything left.
@@ -957,6 +1182,9 @@ class Spec(object):
         # Mark everything in the spec as concrete, as well.
         self._mark_concrete()
 
+        if cache and not self.dependents:
+            cache.store(abstract, self, fingerprint)
+
 
     def _mark_concrete(self):
         """Mark this spec and its dependencies as concrete.
@@ -965,9 +1193,18 @@ class Spec(object):
         unless there is a need to force a spec to be concrete.
         """
         for s in self.traverse():
+            if not s._concrete:
+                s._hash = None
+                s._cmp_key_cache = None
+                s._dep_names = None
+                s._node_orders = None
             s._normal = True
             s._concrete = True
 
+        # Fill in the hash cache bottom-up now that nodes are concrete.
+        self._clear_hash()
+        self.dag_hash()
+
 
     def concretized(self):
         """This is a non-destructive version of concretize().  First clones,
@@ -1155,6 +1392,7 @@ class Spec(object):
         if self.name in visited:
             return False
         visited.add(self.name)
+        concretize_stats['normalize_visits'] += 1
 
         # if we descend into a virtual spec, there's nothing more
         # to normalize.  Concretize will finish resolving it later.
@@ -1302,6 +1540,8 @@ class Spec(object):
         if deps:
             changed |= self._constrain_dependencies(other)
 
+        if changed:
+            self._clear_hash()
         return changed
 
 
@@ -1439,6 +1679,10 @@ class Spec(object):
         """This checks constraints on common dependencies against each other."""
         other = self._autospec(other)
 
+        # Nothing to check if other doesn't constrain dependencies.
+        if not other.dependencies:
+            return True
+
         if strict:
             if other.dependencies and not self.dependencies:
                 return False
@@ -1502,7 +1746,12 @@ class Spec(object):
                        self.variants != other.variants and self._normal != other._normal and
                        self.concrete != other.concrete and self.external != other.external)
 
-        # Local node attributes get copied first.
+        # Local node attributes get copied first.  Nothing is cached
+        # until the new DAG is hooked up.
+        self._hash = None
+        self._cmp_key_cache = None
+        self._dep_names = None
+        self._node_orders = None
         self.name = other.name
         self.versions = other.versions.copy()
         self.architecture = other.architecture
@@ -1532,6 +1781,14 @@ class Spec(object):
         self._normal = other._normal
         self._concrete = other._concrete
         self.external = other.external
+
+        # Cached hashes are only valid if the whole DAG was copied.
+        # Copy them for every node, dependencies first.
+        if kwargs.get('deps', True):
+            for spec in other.traverse(order='post'):
+                node = new_nodes[spec.name]
+                node._hash = spec._hash
+                node._cmp_key_cache = spec._cmp_key_cache
         return changed
 
 
@@ -1657,10 +1914,50 @@ class Spec(object):
         The key is the concatenation of:
           1. A tuple describing this node in the DAG.
           2. The hash of each of this node's dependencies' cmp_keys.
+
+        Concrete specs cache their key and its hash, so hashing a
+        concrete spec does not traverse its DAG.  Like the DAG hash,
+        the cache is cleared by _clear_hash().
         """
-        return self._cmp_node() + (
+        return self._cached_cmp_key()[0]
+
+
+    def _cached_cmp_key(self):
+        """Returns a tuple of this spec's _cmp_key() and its hash."""
+        cached = self._cmp_key_cache
+        if cached:
+            return cached
+
+        key = self._cmp_node() + (
             tuple(hash(self.dependencies[name])
                   for name in sorted(self.dependencies)),)
+        cached = (key, hash(key))
+        if self._concrete and all(
+                d._cmp_key_cache for d in self.dependencies.values()):
+            self._cmp_key_cache = cached
+        return cached
+
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other is None:
+            return False
+
+        # Concrete specs with different DAG hashes can't be equal.
+        # Their hashes are usually cached, so this is fast.
+        if self._concrete and other._concrete:
+            if self.dag_hash() != other.dag_hash():
+                return False
+        return self._cmp_key() == other._cmp_key()
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    def __hash__(self):
+        return self._cached_cmp_key()[1]
 
 
     def colorized(self):
@@ -1866,6 +2163,22 @@ class Spec(object):
         return str(self)
 
 
+    def __getstate__(self):
+        # The cached comparison key holds string hashes, which are not
+        # necessarily the same in another process.
+        return dict((name, getattr(self, name))
+                    for name in self.__slots__
+                    if name not in self._transient_slots
+                    and hasattr(self, name))
+
+
+    def __setstate__(self, state):
+        for name in self._transient_slots:
+            setattr(self, name, None)
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
 #
 # These are possible token types in the spec grammar.
 #
@@ -1946,6 +2259,10 @@ class SpecParser(spack.parse.Parser):
 
         spec._normal = False
         spec._concrete = False
+        spec._hash = None
+        spec._cmp_key_cache = None
+        spec._dep_names = None
+        spec._node_orders = None
 
         # record this so that we know whether version is
         # unspecified or not.
@@ -2047,11 +2364,52 @@ class SpecParser(spack.parse.Parser):
             self.last_token_error("Identifier cannot contain '.'")
 
 
+def _cached_parse(kind, string, parse_function):
+    """Parse a string with parse_function, or get the result of parsing
+       it earlier from the parse cache.  The result is shared, so it
+       must not be modified or handed out; callers return copies."""
+    key = (kind, string)
+    if key in _parse_cache:
+        # Move the string to the most recently used end of the cache.
+        result = _parse_cache.pop(key)
+    else:
+        result = parse_function(string)
+        if len(_parse_cache) >= _parse_cache_size:
+            _parse_cache.popitem(last=False)
+    _parse_cache[key] = result
+    return result
+
+
 def parse(string):
     """Returns a list of specs from an input string.
        For creating one spec, see Spec() constructor.
     """
-    return SpecParser().parse(string)
+    specs = _cached_parse('specs', string, lambda s: SpecParser().parse(s))
+    return [spec.copy() for spec in specs]
+
+
+def parse_many(strings):
+    """Returns a list of specs for each string in strings.
+
+    This is the same as calling parse() on each string, but a single
+    parser is used for all of them, and repeated strings are only
+    looked up once.
+    """
+    parser = SpecParser()
+    parsed = {}
+    result = []
+    for string in strings:
+        if string not in parsed:
+            parsed[string] = _cached_parse('specs', string, parser.parse)
+        result.append([spec.copy() for spec in parsed[string]])
+    return result
+
+
+def parse_compiler(string):
+    """Returns a CompilerSpec parsed from an input string."""
+    compiler = _cached_parse(
+        'compiler', string, lambda s: SpecParser().parse_compiler(s))
+    return compiler.copy()
 
 
 def parse_anonymous_spec(spec_like, pkg_name):
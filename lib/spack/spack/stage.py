@@ -257,6 +257,10 @@ class Stage(object):
         """Downloads an archive or checks out code from a repository."""
         self.chdir()
 
+        # Use a copy of the archive from the download cache if possible.
+        if self._fetch_from_cache():
+            return
+
         fetchers = []
         if not mirror_only:
             fetchers.append(self.default_fetcher)
@@ -296,6 +300,11 @@ class Stage(object):
                 self.fetcher = fetcher
                 self.fetcher.fetch()
                 break
+            except fs.ChecksumError as e:
+                # The bad archive was not kept, so say why.
+                tty.warn("Fetching from %s failed." % fetcher,
+                         e.message, e.long_message)
+                continue
             except spack.error.SpackError as e:
                 tty.msg("Fetching from %s failed." % fetcher)
                 tty.debug(e)
@@ -305,6 +314,29 @@ class Stage(object):
             self.fetcher = self.default_fetcher
             raise fs.FetchError(errMessage, None)
 
+    def _fetch_from_cache(self):
+        """Link a cached archive with the default fetcher's digest into
+           the stage.  Returns True if there was one."""
+        cache = spack.download_cache
+        fetcher = self.default_fetcher
+        if (not cache or not isinstance(fetcher, fs.URLFetchStrategy) or
+            not fetcher.digest):
+            return False
+
+        archive_path = os.path.join(self.path, os.path.basename(fetcher.url))
+        if os.path.exists(archive_path):
+            return False
+
+        if not cache.fetch(fetcher.digest, archive_path):
+            return False
+
+        fetcher.set_stage(self)
+        self.fetcher = fetcher
+        self.skip_checksum_for_mirror = False
+        tty.msg("Using cached archive for %s" % fetcher.url)
+        return True
+
+
     def check(self):
         """Check the downloaded archive against a checksum digest.
            No-op if this stage checks code out of a repository."""
@@ -318,6 +350,12 @@ class Stage(object):
         else:
             self.fetcher.check()
 
+            # The archive is good, so keep it for next time.
+            cache = spack.download_cache
+            if (cache and isinstance(self.fetcher, fs.URLFetchStrategy) and
+                self.fetcher.digest):
+                cache.store(self.fetcher.digest, self.archive_file)
+
     def expand_archive(self):
         """Changes to the stage directory and attempt to expand the downloaded
            archive.  Fail if the stage is not set up or if the archive is not yet
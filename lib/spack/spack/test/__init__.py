@@ -67,7 +67,12 @@ test_names = ['versions',
               'namespace_trie',
               'yaml',
               'sbang',
-              'environment']
+              'environment',
+              'compiler_cache',
+              'multiproc',
+              'web',
+              'remote_version_cache',
+              'globals']
 
 
 def list_tests():
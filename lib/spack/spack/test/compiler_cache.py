@@ -0,0 +1,129 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""
+Tests for the cache of detected compiler versions.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from llnl.util.filesystem import join_path
+
+import spack
+import spack.compilers
+from spack.compiler_cache import CompilerVersionCache
+
+fake_gcc = """\
+#!/bin/sh
+echo run >> %s
+echo %s
+"""
+
+class CompilerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.bin = join_path(self.tmpdir, 'bin')
+        os.mkdir(self.bin)
+        self.runs = join_path(self.tmpdir, 'runs')
+
+        self.saved_cache = spack.compiler_cache
+        spack.compiler_cache = CompilerVersionCache(join_path(self.tmpdir, 'cache'))
+
+
+    def tearDown(self):
+        spack.compiler_cache = self.saved_cache
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+    def write_gcc(self, version):
+        gcc = join_path(self.bin, 'gcc')
+        with open(gcc, 'w') as f:
+            f.write(fake_gcc % (self.runs, version))
+        os.chmod(gcc, 0755)
+
+
+    def find_versions(self):
+        gcc = spack.compilers.class_for_compiler_name('gcc')
+        return [str(c.version) for c in gcc.find(self.bin)]
+
+
+    def count_runs(self):
+        if not os.path.exists(self.runs):
+            return 0
+        with open(self.runs) as f:
+            return len(f.readlines())
+
+
+    def test_unchanged_compiler_not_rerun(self):
+        self.write_gcc('4.9.2')
+        self.assertEqual(self.find_versions(), ['4.9.2'])
+        self.assertEqual(self.count_runs(), 1)
+
+        self.assertEqual(self.find_versions(), ['4.9.2'])
+        self.assertEqual(self.count_runs(), 1)
+
+
+    def test_changed_compiler_rerun(self):
+        self.write_gcc('4.9.2')
+        self.assertEqual(self.find_versions(), ['4.9.2'])
+
+        self.write_gcc('5.3.0')
+        self.assertEqual(self.find_versions(), ['5.3.0'])
+        self.assertEqual(self.count_runs(), 2)
+
+
+    def test_cache_disabled(self):
+        spack.compiler_cache = None
+        self.write_gcc('4.9.2')
+        self.find_versions()
+        self.find_versions()
+        self.assertEqual(self.count_runs(), 2)
+
+
+    def test_failed_detection_not_cached(self):
+        cache = spack.compiler_cache
+        gcc = join_path(self.bin, 'gcc')
+        self.write_gcc('4.9.2')
+        for version in (None, 'unknown'):
+            cache.store('detector', gcc, version)
+            self.assertEqual(cache.fetch('detector', gcc), None)
+
+        cache.store('detector', gcc, '4.9.2')
+        self.assertEqual(cache.fetch('detector', gcc), '4.9.2')
+
+
+    def test_cached_version_type(self):
+        gcc_class = spack.compilers.class_for_compiler_name('gcc')
+        gcc = join_path(self.bin, 'gcc')
+        self.write_gcc('4.9.2')
+
+        cache = spack.compiler_cache
+        detected = gcc_class.cc_version(gcc)
+        cache.store('detector', gcc, detected)
+        cached = cache.fetch('detector', gcc)
+        self.assertEqual(cached, detected)
+        self.assertEqual(type(cached), type(detected))
@@ -22,8 +22,13 @@
 # along with this program; if not, write to the Free Software Foundation,
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+import sys
+import shutil
+import tempfile
+
 import spack
 from spack.spec import Spec, CompilerSpec
+from spack.concretization_cache import ConcretizationCache
 from spack.version import ver
 from spack.concretize import find_spec
 from spack.test.mock_packages_test import *
@@ -325,3 +330,78 @@ class ConcretizeTest(MockPackagesTest):
         s.concretize()
         self.assertTrue(s['mpileaks'].satisfies('%clang'))
         self.assertTrue(s['dyninst'].satisfies('%gcc'))
+
+
+    def test_concretize_stats(self):
+        stats = spack.spec.concretize_stats
+        before = dict(stats)
+        spec = Spec('mpileaks ^mpich')
+        spec.concretize()
+
+        for key in stats:
+            self.assertTrue(stats[key] > before[key])
+
+
+    def test_expand_virtuals_skips_unchanged_nodes(self):
+        spec = Spec('mpileaks ^mpich').normalized()
+        examined = {}
+        spec._expand_virtual_packages(examined)
+
+        visits = spack.spec.concretize_stats['virtual_visits']
+        self.assertFalse(spec._expand_virtual_packages(examined))
+        self.assertEqual(spack.spec.concretize_stats['virtual_visits'], visits)
+
+
+    def test_concretization_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        spack.concretization_cache = ConcretizationCache(tmpdir)
+        try:
+            first = Spec('mpileaks ^mpich').concretized()
+
+            # The second concretization comes from the cache.
+            passes = spack.spec.concretize_stats['passes']
+            second = Spec('mpileaks ^mpich').concretized()
+            self.assertEqual(spack.spec.concretize_stats['passes'], passes)
+            self.assertTrue(second.concrete)
+            self.assertEqual(first, second)
+            self.assertEqual(first.dag_hash(), second.dag_hash())
+
+            # Entries with a different fingerprint are not used.
+            cache = spack.concretization_cache
+            abstract = Spec('mpileaks ^mpich')
+            self.assertTrue(cache.fetch(abstract, cache.fingerprint()))
+            self.assertEqual(cache.fetch(abstract, 'stale'), None)
+        finally:
+            spack.concretization_cache = None
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+    def test_concretization_cache_fingerprint(self):
+        cache = ConcretizationCache(tempfile.mkdtemp())
+        try:
+            fingerprint = cache.fingerprint()
+            self.assertEqual(fingerprint, cache.fingerprint())
+
+            # Changing a package invalidates the cache the next time
+            # Spack runs.  Package files in the tree are not touched;
+            # the module's _stat() pretends that one has changed.
+            path = spack.repo.filename_for_package_name('mpileaks')
+            cache_module = sys.modules[ConcretizationCache.__module__]
+            real_stat = cache_module._stat
+            def changed_stat(p):
+                return real_stat(p) + ('changed',) if p == path else real_stat(p)
+            cache_module._stat = changed_stat
+            try:
+                self.assertEqual(fingerprint, cache.fingerprint())
+                self.assertNotEqual(
+                    fingerprint, ConcretizationCache(cache.root).fingerprint())
+            finally:
+                cache_module._stat = real_stat
+
+            # Changing the configuration recomputes it right away.
+            state = cache._fingerprint[0]
+            spack.config.clear_config_caches()
+            self.assertEqual(fingerprint, cache.fingerprint())
+            self.assertNotEqual(state, cache._fingerprint[0])
+        finally:
+            cache.destroy()
@@ -351,3 +351,127 @@ class DatabaseTest(MockPackagesTest):
         # mpich ref count updated properly.
         mpich_rec = self.installed_db.get_record('mpich')
         self.assertEqual(mpich_rec.ref_count, 0)
+
+
+    def test_100_json_index_migration(self):
+        """Reading a YAML index and writing it back out as JSON."""
+        json_db = Database(self.install_path, index_format='json')
+        with json_db.read_transaction():
+            expected = sorted(json_db.query(installed=any))
+
+        # Nothing was written yet, so this read the YAML index.
+        index_file = join_path(self.install_path, '.spack-db', 'index.json')
+        self.assertFalse(os.path.exists(index_file))
+
+        with json_db.write_transaction():
+            pass
+        self.assertTrue(os.path.exists(index_file))
+
+        # Reading the JSON index gives back the same specs and hashes.
+        json_db = Database(self.install_path, index_format='json')
+        with json_db.read_transaction():
+            actual = sorted(json_db.query(installed=any))
+            self.assertEqual(len(expected), len(actual))
+            for e, a in zip(expected, actual):
+                self.assertEqual(e, a)
+                self.assertEqual(e.dag_hash(), a.dag_hash())
+                self.assertEqual(json_db.get_record(a).ref_count,
+                                 self.installed_db.get_record(e).ref_count)
+
+        json_db._check_ref_counts()
+
+
+    def test_110_json_index_specs_are_lazy(self):
+        """Specs in a JSON index are only built for records that are used."""
+        json_db = Database(self.install_path, index_format='json')
+        with json_db.write_transaction():
+            pass
+
+        json_db = Database(self.install_path, index_format='json')
+        with json_db.read_transaction():
+            self.assertEqual(len(json_db.query('libelf')), 1)
+            built = [rec for rec in json_db._data.values()
+                     if rec._spec is not None]
+            self.assertEqual([rec.name for rec in built], ['libelf'])
+
+
+    def test_120_unchanged_index_is_not_reread(self):
+        """The index is only read again when another process changes it."""
+        with self.installed_db.read_transaction():
+            data = self.installed_db._data
+        with self.installed_db.read_transaction():
+            self.assertTrue(self.installed_db._data is data)
+
+        # A write from another Database instance changes the index.
+        other_db = Database(self.install_path)
+        with other_db.write_transaction():
+            other_db._remove(Spec('mpileaks ^zmpi'))
+
+        with self.installed_db.read_transaction():
+            self.assertFalse(self.installed_db._data is data)
+            self.assertEqual(self.installed_db.query('mpileaks ^zmpi'), [])
+
+
+    def test_130_indexed_query(self):
+        """Indexed queries give the same results as checking every record."""
+        all_specs = self.installed_db.query(installed=any)
+        for query in ('mpileaks', 'mpileaks ^mpich', 'mpi', 'mpi@:1',
+                      'callpath@1.0', 'libelf@0.8.13', 'dyninst@2:',
+                      'mpileaks%gcc', 'mpileaks%nonexistent',
+                      'mpileaks=nonexistent', 'builtin.mock.libelf',
+                      'nonexistent.libelf'):
+            expected = sorted(s for s in all_specs if s.satisfies(query))
+            self.assertEqual(
+                self.installed_db.query(query, installed=any), expected)
+
+        # Only records with the right name are candidates.
+        with self.installed_db.read_transaction():
+            index = self.installed_db._get_query_index()
+            self.assertEqual(len(index.candidates(Spec('callpath'))), 3)
+            self.assertEqual(len(index.candidates(Spec('mpi'))), 3)
+
+        # Indexes are kept up to date as records are removed.
+        self.installed_db.remove('mpileaks ^zmpi')
+        self.assertEqual(len(self.installed_db.query('mpileaks')), 2)
+        self.assertEqual(self.installed_db.query('mpileaks ^zmpi'), [])
+
+
+    def test_140_prefix_locks(self):
+        """Each spec gets its own range in the prefix lock file."""
+        specs = self.installed_db.query(installed=any)
+        locks = [self.installed_db.prefix_lock(s) for s in specs]
+        self.assertEqual(len(set(l._start for l in locks)), len(specs))
+        self.assertTrue(self.installed_db.prefix_lock(specs[0]) is locks[0])
+
+        def check_locks():
+            db = Database(self.install_path)
+            self.assertRaises(LockError,
+                              db.prefix_lock(specs[0]).acquire_write, 0.1)
+            with db.prefix_write_lock(specs[1], 0.1):
+                pass
+
+        with self.installed_db.prefix_write_lock(specs[0]):
+            p = multiprocessing.Process(target=check_locks, args=())
+            p.start()
+            p.join()
+            self.assertEqual(p.exitcode, 0)
+
+
+    def test_150_installed_dependents(self):
+        """Dependents from the index match a search of every spec."""
+        all_specs = self.installed_db.query(installed=any)
+        for spec in all_specs:
+            expected = sorted(
+                s for s in self.installed_db.query()
+                if s.name != spec.name and
+                any(d.dag_hash() == spec.dag_hash() for d in s.traverse()))
+            self.assertEqual(
+                self.installed_db.installed_dependents(spec), expected)
+
+        # Reverse edges are kept up to date as records are removed.
+        callpath = self.installed_db.query_one('callpath ^mpich')
+        self.assertEqual(
+            len(self.installed_db.installed_dependents(callpath)), 1)
+        self.installed_db.remove('mpileaks ^mpich')
+        self.assertEqual(
+            self.installed_db.installed_dependents(callpath), [])
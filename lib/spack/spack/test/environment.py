@@ -5,12 +5,17 @@ from spack.environment import EnvironmentModifications
 
 class EnvironmentTest(unittest.TestCase):
     def setUp(self):
+        self.saved_environ = os.environ.copy()
         os.environ.clear()
         os.environ['UNSET_ME'] = 'foo'
         os.environ['EMPTY_PATH_LIST'] = ''
         os.environ['PATH_LIST'] = '/path/second:/path/third'
         os.environ['REMOVE_PATH_LIST'] = '/a/b:/duplicate:/a/c:/remove/this:/a/d:/duplicate/:/f/g'
 
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.saved_environ)
+
     def test_set(self):
         env = EnvironmentModifications()
         env.set('A', 'dummy value')
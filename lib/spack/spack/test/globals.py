@@ -0,0 +1,52 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""
+Tests for Spack's lazily created global objects.
+"""
+import sys
+import unittest
+
+import spack
+from spack.util.executable import Executable
+
+cache_names = ('download_cache', 'concretization_cache',
+               'compiler_cache', 'remote_version_cache')
+
+# Uses each cache, the way a command would, and then prints the type
+# of each global.  `spack python -c` runs a single line.
+check_caches = ("import spack; "
+                "roots = [getattr(spack, n).root for n in %r]; "
+                "print(' '.join(type(getattr(spack, n)).__name__ for n in %r))"
+                % (cache_names, cache_names))
+
+class GlobalsTest(unittest.TestCase):
+
+    def test_caches_in_fresh_process(self):
+        # Test modules import the cache modules themselves, so only a
+        # fresh process shows whether a global is hidden by its module.
+        spack_cmd = Executable(sys.executable)
+        spack_cmd.add_default_arg(spack.spack_file)
+        output = spack_cmd('python', '-c', check_caches, output=str)
+        self.assertEqual(output.split(), ['Singleton'] * len(cache_names))
@@ -29,6 +29,7 @@ import spack
 from llnl.util.filesystem import *
 from spack.directory_layout import YamlDirectoryLayout
 from spack.fetch_strategy import URLFetchStrategy, FetchStrategyComposite
+from spack.prefetch import Prefetcher
 from spack.test.mock_packages_test import *
 from spack.test.mock_repo import MockArchive
 
@@ -85,3 +86,37 @@ class InstallTest(MockPackagesTest):
         except Exception, e:
             pkg.remove_prefix()
             raise
+
+
+    def test_prefetch(self):
+        spec = Spec('trivial_install_test_package')
+        spec.concretize()
+        pkg = spack.repo.get(spec)
+
+        fetcher = FetchStrategyComposite()
+        fetcher.append(URLFetchStrategy(self.repo.url))
+        pkg.fetcher = fetcher
+
+        try:
+            prefetcher = Prefetcher([pkg], jobs=2)
+            self.assertEqual(prefetcher.fetch(), [])
+            self.assertEqual(prefetcher.fetched, [pkg])
+            self.assertTrue(os.path.isfile(pkg.stage.archive_file))
+        finally:
+            pkg.do_clean()
+
+
+    def test_parallel_fake_install(self):
+        spec = Spec('mpileaks')
+        spec.concretize()
+        pkg = spack.repo.get(spec)
+
+        try:
+            pkg.do_install(fake=True, parallel_packages=4, make_jobs=4)
+            for s in spec.traverse():
+                self.assertTrue(s.package.installed)
+        finally:
+            # Uninstall dependents before their dependencies.
+            for s in spec.traverse(order='pre'):
+                if s.package.installed:
+                    s.package.do_uninstall(force=True)
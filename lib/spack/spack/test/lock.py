@@ -27,6 +27,7 @@ These tests ensure that our lock works correctly.
 """
 import shutil
 import tempfile
+import time
 import unittest
 from multiprocessing import Process
 
@@ -262,3 +263,81 @@ class LockTest(unittest.TestCase):
             lock.release_read()
 
         self.multiproc_test(p1, p2, p3)
+
+
+    #
+    # Byte-range locks on separate regions of a file are independent.
+    #
+    def acquire_write_range(self, start, length):
+        def fn(barrier):
+            lock = Lock(self.lock_path, start, length)
+            lock.acquire_write()
+            barrier.wait()
+            barrier.wait()
+        return fn
+
+    def timeout_write_range(self, start, length):
+        def fn(barrier):
+            lock = Lock(self.lock_path, start, length)
+            barrier.wait()
+            self.assertRaises(LockError, lock.acquire_write, 0.1)
+            barrier.wait()
+        return fn
+
+    def test_write_ranges_do_not_contend(self):
+        self.multiproc_test(self.acquire_write_range(0, 1),
+                            self.acquire_write_range(1, 1),
+                            self.acquire_write_range(2, 1))
+
+    def test_overlapping_write_ranges_time_out(self):
+        self.multiproc_test(self.acquire_write_range(0, 2),
+                            self.timeout_write_range(1, 1),
+                            self.timeout_write_range(0, 0))
+
+    def test_release_range_keeps_other_ranges(self):
+        """Releasing one range must not drop this process's other locks."""
+        def p1(barrier):
+            lock1 = Lock(self.lock_path, 0, 1)
+            lock2 = Lock(self.lock_path, 1, 1)
+            lock1.acquire_write()
+            lock2.acquire_write()
+            lock1.release_write()
+            barrier.wait()
+            barrier.wait()
+            lock2.release_write()
+
+        def p2(barrier):
+            barrier.wait()
+            Lock(self.lock_path, 0, 1).acquire_write(0.1)
+            self.assertRaises(LockError,
+                              Lock(self.lock_path, 1, 1).acquire_write, 0.1)
+            barrier.wait()
+
+        self.multiproc_test(p1, p2)
+
+
+    #
+    # Contention statistics.
+    #
+    def test_contention_stats(self):
+        def p1(barrier):
+            lock = Lock(self.lock_path)
+            lock.acquire_write()
+            barrier.wait()
+            time.sleep(0.2)
+            lock.release_write()
+
+        def p2(barrier):
+            lock = Lock(self.lock_path)
+            barrier.wait()
+            lock.acquire_write(5)
+            self.assertEqual(lock.acquisitions, 1)
+            self.assertTrue(lock.retries > 0)
+            self.assertTrue(lock.wait_time > 0.1)
+
+            # With backoff, waiting 0.2s takes few attempts.
+            self.assertTrue(lock.retries < 100)
+            lock.release_write()
+
+        self.multiproc_test(p1, p2)
+
@@ -70,6 +70,11 @@ class MockPackagesTest(unittest.TestCase):
         self.db = RepoPath(spack.mock_packages_path)
         spack.repo.swap(self.db)
 
+        # Tests modify mock packages in place, so don't cache
+        # concretized specs.
+        self.saved_concretization_cache = spack.concretization_cache
+        spack.concretization_cache = None
+
         spack.config.clear_config_caches()
         self.real_scopes = spack.config.config_scopes
 
@@ -115,6 +120,7 @@ class MockPackagesTest(unittest.TestCase):
     def cleanmock(self):
         """Restore the real packages path after any test."""
         spack.repo.swap(self.db)
+        spack.concretization_cache = self.saved_concretization_cache
         spack.config.config_scopes = self.real_scopes
         shutil.rmtree(self.temp_config, ignore_errors=True)
         spack.config.clear_config_caches()
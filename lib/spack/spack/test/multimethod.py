@@ -27,7 +27,9 @@ Test for multi_method dispatch.
 """
 
 import spack
+import spack.multimethod
 from spack.multimethod import *
+from spack.spec import Spec
 from spack.test.mock_packages_test import *
 from spack.version import *
 
@@ -124,3 +126,25 @@ class MultiMethodTest(MockPackagesTest):
 
         pkg = spack.repo.get('multimethod^mpich@1.0')
         self.assertEqual(pkg.different_by_virtual_dep(), 1)
+
+
+    def test_dispatch_cached_for_concrete_specs(self):
+        stats = spack.multimethod.dispatch_stats
+
+        pkg = spack.repo.get(Spec('multimethod@3.0').concretized())
+        self.assertEqual(pkg.no_version_2(), 3)
+
+        hits, checks = stats['cache_hits'], stats['satisfies']
+        for i in range(3):
+            self.assertEqual(pkg.no_version_2(), 3)
+        self.assertEqual(stats['cache_hits'], hits + 3)
+        self.assertEqual(stats['satisfies'], checks)
+
+        # A different spec gets its own method.
+        pkg = spack.repo.get(Spec('multimethod@4.0').concretized())
+        self.assertEqual(pkg.no_version_2(), 4)
+
+        # Abstract specs are not cached.
+        pkg = spack.repo.get('multimethod@2.0')
+        self.assertRaises(NoSuchMethodError, pkg.no_version_2)
+        self.assertRaises(NoSuchMethodError, pkg.no_version_2)
@@ -0,0 +1,86 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""
+Tests for parmap() and wait_for_any() in spack.util.multiproc.
+"""
+import os
+import time
+import unittest
+
+from spack.util.multiproc import *
+
+
+class ParmapTest(unittest.TestCase):
+
+    def test_results_in_order(self):
+        self.assertEqual(parmap(lambda x: x * x, range(50), jobs=4),
+                         [x * x for x in range(50)])
+        self.assertEqual(parmap(lambda x: x, []), [])
+
+
+    def test_number_of_workers_is_bounded(self):
+        pids = parmap(lambda x: os.getpid(), range(40), jobs=3, chunk_size=2)
+        self.assertTrue(len(set(pids)) <= 3)
+
+
+    def test_error_propagation(self):
+        self.assertRaises(ZeroDivisionError,
+                          parmap, lambda x: 1 / x, [1, 0, 2], jobs=2)
+
+
+    def test_worker_exit(self):
+        self.assertRaises(ParmapError, parmap, lambda x: os._exit(1), [1])
+
+
+    def test_timeout(self):
+        self.assertRaises(ParmapTimeoutError, parmap,
+                          lambda x: time.sleep(x), [0, 10, 0], timeout=0.5)
+
+
+    def test_wait_for_any(self):
+        def child(code):
+            pid = os.fork()
+            if pid == 0:
+                time.sleep(0.1 * code)
+                os._exit(code)
+            return pid
+
+        other = child(2)
+        mine = [child(1), child(3)]
+        try:
+            pid, status = wait_for_any(mine)
+            self.assertEqual(pid, mine[0])
+            self.assertEqual(os.WEXITSTATUS(status), 1)
+
+            # Children that weren't asked about are left alone.
+            pid, status = wait_for_any([mine[1]])
+            self.assertEqual(pid, mine[1])
+            self.assertEqual(os.waitpid(other, 0)[0], other)
+        finally:
+            for pid in [other] + mine:
+                try:
+                    os.waitpid(pid, 0)
+                except OSError:
+                    pass
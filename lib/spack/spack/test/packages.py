@@ -23,9 +23,13 @@
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
 
+import os
+import shutil
+import tempfile
+
 import spack
 from llnl.util.filesystem import join_path
-from spack.repository import Repo
+from spack.repository import Repo, RepoIndex, create_repo
 from spack.test.mock_packages_test import *
 from spack.util.naming import mod_to_class
 
@@ -102,3 +106,84 @@ class PackagesTest(MockPackagesTest):
         import spack.pkg.builtin.mock
         import spack.pkg.builtin.mock as m
         from spack.pkg.builtin import mock
+
+
+    #
+    # Tests for the persistent package metadata index.
+    #
+
+    def test_repo_index_matches_packages(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            repo = Repo(spack.mock_packages_path)
+            index = RepoIndex(repo, cache_dir)
+
+            for name in repo.all_package_names():
+                pkg_class = repo.get_pkg_class(name)
+                self.assertEqual(index.provided(name),
+                                 getattr(pkg_class, 'provided', {}))
+                self.assertEqual(index.dependencies(name),
+                                 getattr(pkg_class, 'dependencies', {}))
+                self.assertEqual(sorted(index[name]['variants']),
+                                 sorted(getattr(pkg_class, 'variants', {})))
+
+            self.assertTrue(os.path.exists(index.index_path))
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+    def test_repo_index_is_persistent(self):
+        # Use a copy of some mock packages, so that files in the
+        # Spack tree are not touched.
+        tmpdir = tempfile.mkdtemp()
+        try:
+            root, _ = create_repo(join_path(tmpdir, 'repo'), 'indextest')
+            mock_repo = Repo(spack.mock_packages_path)
+            for name in ('mpich', 'zmpi'):
+                shutil.copytree(mock_repo.dirname_for_package_name(name),
+                                join_path(root, 'packages', name))
+
+            cache_dir = join_path(tmpdir, 'cache')
+            repo = Repo(root)
+            RepoIndex(repo, cache_dir).packages
+
+            # A fresh repo reads the index and does not import packages.
+            repo = Repo(root)
+            index = RepoIndex(repo, cache_dir)
+            self.assertTrue('mpich' in index)
+            self.assertFalse(repo._modules)
+
+            # Only packages whose files changed are re-read.
+            filename = repo.filename_for_package_name('mpich')
+            st = os.stat(filename)
+            os.utime(filename, (st.st_atime, st.st_mtime + 1))
+
+            repo = Repo(root)
+            index = RepoIndex(repo, cache_dir)
+            self.assertTrue('mpich' in index)
+            self.assertEqual(repo._modules.keys(), ['mpich'])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+    def test_repo_index_urls(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            repo = Repo(spack.mock_packages_path)
+            index = RepoIndex(repo, cache_dir)
+            for name in repo.all_package_names():
+                pkg_class = repo.get_pkg_class(name)
+                versions = getattr(pkg_class, 'versions', {})
+                urls = set(args['url'] for args in versions.values()
+                           if 'url' in args)
+                if getattr(pkg_class, 'url', None):
+                    urls.add(pkg_class.url)
+                self.assertEqual(index.urls(name), sorted(urls))
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+    def test_providers_for_from_index(self):
+        providers = spack.repo.providers_for('mpi@2')
+        self.assertEqual(sorted(set(p.name for p in providers)),
+                         ['mpich', 'mpich2', 'zmpi'])
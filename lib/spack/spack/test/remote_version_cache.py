@@ -0,0 +1,105 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""
+Tests for the cache of remote package versions.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from llnl.util.filesystem import join_path
+
+from spack.version import Version
+from spack.remote_version_cache import RemoteVersionCache, fetch_remote_versions
+
+
+class FakePackage(object):
+    def __init__(self, name, url):
+        self.name = name
+        self.namespace = 'test'
+        self.all_urls = [url]
+        self.list_url = None
+        self.list_depth = 1
+        self.versions = {}
+
+    def fetch_remote_versions(self, refresh=False):
+        if isinstance(self.versions, Exception):
+            raise self.versions
+        return self.versions
+
+
+class RemoteVersionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = RemoteVersionCache(self.tmpdir, ttl=60)
+        self.pkg = FakePackage('foo', 'http://example.com/foo-1.0.tar.gz')
+        self.versions = {
+            Version('1.0') : 'http://example.com/foo-1.0.tar.gz',
+            Version('1.2') : 'http://example.com/foo-1.2.tar.gz' }
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+    def test_put_get(self):
+        self.assertEqual(self.cache.get(self.pkg), None)
+        self.cache.put(self.pkg, self.versions)
+        self.assertEqual(self.cache.get(self.pkg), self.versions)
+        self.assertTrue(os.path.isfile(
+            join_path(self.tmpdir, 'test', 'foo.json')))
+
+
+    def test_expired(self):
+        self.cache.put(self.pkg, self.versions)
+        self.assertEqual(self.cache.get(self.pkg), self.versions)
+
+        self.cache.ttl = -1
+        self.assertEqual(self.cache.get(self.pkg), None)
+
+        self.cache.ttl = None
+        self.assertEqual(self.cache.get(self.pkg), self.versions)
+
+
+    def test_urls_changed(self):
+        self.cache.put(self.pkg, self.versions)
+        self.pkg.list_url = 'http://example.com/downloads/'
+        self.assertEqual(self.cache.get(self.pkg), None)
+
+
+    def test_destroy(self):
+        self.cache.put(self.pkg, self.versions)
+        self.cache.destroy()
+        self.assertEqual(self.cache.get(self.pkg), None)
+
+
+    def test_fetch_error_skips_package(self):
+        bad = FakePackage('bad', 'http://example.com/bad-1.0.tar.gz')
+        bad.versions = ValueError('bad page')
+        self.pkg.versions = self.versions
+        self.assertEqual(fetch_remote_versions([bad, self.pkg], jobs=2),
+                         [None, self.versions])
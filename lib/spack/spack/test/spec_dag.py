@@ -28,6 +28,8 @@ You can find the dummy packages here::
 
     spack/lib/spack/spack/test/mock_packages
 """
+import sys
+
 import spack
 import spack.package
 
@@ -437,3 +439,100 @@ class SpecDagTest(MockPackagesTest):
         orig_ids = set(id(s) for s in orig.traverse())
         copy_ids = set(id(s) for s in copy.traverse())
         self.assertFalse(orig_ids.intersection(copy_ids))
+
+
+    def test_dag_hash_cached_on_concretize(self):
+        spec = Spec('mpileaks ^mpich')
+        spec.concretize()
+
+        hashes = dict((s.name, s._hash) for s in spec.traverse())
+        self.assertTrue(all(hashes.values()))
+
+        # cached hashes should match freshly computed ones.
+        for s in spec.traverse():
+            s._hash = None
+        for s in spec.traverse():
+            self.assertEqual(hashes[s.name], s.dag_hash())
+
+
+    def test_dag_hash_cache_copied(self):
+        orig = Spec('mpileaks')
+        orig.concretize()
+        copy = orig.copy()
+
+        self.assertEqual(orig._hash, copy._hash)
+        self.assertEqual(orig.dag_hash(), copy.dag_hash())
+
+
+    def test_dag_hash_invalidated_on_change(self):
+        spec = Spec('mpileaks ^mpich')
+        spec.concretize()
+        old_hashes = dict((s.name, s.dag_hash()) for s in spec.traverse())
+
+        spec['libelf']._add_dependency(Spec('fake'))
+
+        # libelf and everything that depends on it changes.
+        for name in ('mpileaks', 'callpath', 'dyninst', 'libdwarf', 'libelf'):
+            self.assertNotEqual(old_hashes[name], spec[name].dag_hash())
+        self.assertEqual(old_hashes['mpich'], spec['mpich'].dag_hash())
+
+
+    def test_cmp_key_cached_for_concrete_specs(self):
+        abstract = Spec('mpileaks ^mpich')
+        hash(abstract)
+        self.assertEqual(abstract._cmp_key_cache, None)
+
+        spec = abstract.concretized()
+        key = spec._cmp_key()
+        self.assertTrue(spec._cmp_key() is key)
+        self.assertEqual(hash(spec), hash(key))
+
+        # Changing a dependency invalidates the keys of its dependents.
+        spec['libelf']._add_dependency(Spec('fake'))
+        self.assertEqual(spec._cmp_key_cache, None)
+        self.assertNotEqual(spec._cmp_key(), key)
+
+
+    def test_concrete_spec_equality(self):
+        spec = Spec('mpileaks ^mpich').concretized()
+        copy = spec.copy()
+        self.assertEqual(spec, copy)
+        self.assertEqual(hash(spec), hash(copy))
+        self.assertEqual(len(set([spec, copy])), 1)
+
+        other = Spec('mpileaks ^zmpi').concretized()
+        self.assertNotEqual(spec, other)
+        self.assertFalse(spec == other)
+        self.assertTrue(spec != other)
+
+
+    def test_traverse_deep_dag(self):
+        # Just deeper than Python's recursion limit.
+        n = sys.getrecursionlimit() + 100
+        chain = [Spec('node%d' % i) for i in range(n)]
+        for parent, child in zip(chain, chain[1:]):
+            parent._add_dependency(child)
+
+        names = [s.name for s in chain[0].traverse(order='post')]
+        self.assertEqual(names, [s.name for s in reversed(chain)])
+
+        depths = [d for d, s in chain[-1].traverse(direction='parents', depth=True)]
+        self.assertEqual(depths, range(n))
+
+
+    def test_traverse_order_cached_for_concrete_specs(self):
+        spec = Spec('mpileaks ^mpich').concretized()
+        pre = list(spec.traverse())
+        post = list(spec.traverse(order='post'))
+
+        # Cached orders match a traversal that doesn't use the cache.
+        self.assertEqual(pre, list(spec.traverse(key=lambda s: id(s))))
+        self.assertEqual(post, list(spec.traverse(order='post', key=lambda s: id(s))))
+        self.assertEqual(pre[1:], list(spec.traverse(root=False)))
+        self.assertEqual(post[:-1], list(spec.traverse(order='post', root=False)))
+
+        # Changing the DAG invalidates the cached orders.
+        fake = Spec('fake')
+        spec['libelf']._add_dependency(fake)
+        self.assertTrue(fake in list(spec.traverse()))
+        self.assertTrue(fake in list(spec.traverse(order='post')))
@@ -366,3 +366,15 @@ class SpecSematicsTest(MockPackagesTest):
         self.check_constrain_not_changed('libelf^foo+debug', 'libelf^foo+debug')
         self.check_constrain_not_changed('libelf^foo~debug', 'libelf^foo~debug')
         self.check_constrain_not_changed('libelf^foo=bgqos_0', 'libelf^foo=bgqos_0')
+
+
+    def test_package_set_attributes(self):
+        # Packages set these on their own specs in
+        # setup_dependent_package(), for their dependents to use.
+        import pickle
+        s = Spec('libelf')
+        for name in ('fc_link', 'cc_link', 'libraries'):
+            setattr(s, name, '-L/foo -lfoo')
+            self.assertEqual(getattr(s, name), '-L/foo -lfoo')
+            copy = pickle.loads(pickle.dumps(s, 2))
+            self.assertEqual(getattr(copy, name), '-L/foo -lfoo')
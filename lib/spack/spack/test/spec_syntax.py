@@ -179,3 +179,36 @@ class SpecSyntaxTest(unittest.TestCase):
         self.check_lex(
             complex_lex,
             "mvapich_foo ^ _openmpi @ 1.2 : 1.4 , 1.6 % intel @ 12.1 : 12.6 + debug - qt_4 ^ stackwalker @ 8.1_1e")
+
+    def test_lex_error(self):
+        self.assertRaises(spack.parse.LexError, SpecLexer().lex, "mpileaks@1.2 $foo")
+        try:
+            SpecLexer().lex("mpileaks@1.2 $foo")
+        except spack.parse.LexError, e:
+            self.assertEqual(e.pos, 13)
+
+    # ================================================================================
+    # Parse cache
+    # ================================================================================
+    def test_parse_cache_returns_copies(self):
+        spec = Spec('mpileaks@1.2 ^callpath')
+        spec.versions = ver('1.3')
+        spec.dependencies['callpath'].versions = ver('2.0')
+        self.assertEqual(str(Spec('mpileaks@1.2 ^callpath')), 'mpileaks@1.2^callpath')
+
+        compiler = CompilerSpec('gcc@4.5')
+        compiler.versions = ver('4.7')
+        self.assertEqual(str(CompilerSpec('gcc@4.5')), 'gcc@4.5')
+
+
+    def test_parse_cache_is_bounded(self):
+        for i in range(spack.spec._parse_cache_size + 10):
+            Spec('mpileaks@%d' % i)
+        self.assertEqual(len(spack.spec._parse_cache), spack.spec._parse_cache_size)
+
+
+    def test_parse_many(self):
+        strings = ['mpileaks ^callpath', 'mpich mpileaks', 'mpileaks ^callpath']
+        specs = spack.spec.parse_many(strings)
+        self.assertEqual([spack.spec.parse(s) for s in strings], specs)
+        self.assertFalse(specs[0][0] is specs[2][0])
@@ -27,16 +27,21 @@ Test that the Stage class works correctly.
 """
 import os
 import shutil
+import hashlib
 import unittest
 from contextlib import *
 
 import spack
+import spack.util.crypto as crypto
 from llnl.util.filesystem import *
+from spack.download_cache import DownloadCache
+from spack.fetch_strategy import URLFetchStrategy, FetchError, ChecksumError
 from spack.stage import Stage
 from spack.util.executable import which
 
 test_files_dir = join_path(spack.stage_path, '.test')
 test_tmp_path  = join_path(test_files_dir, 'tmp')
+test_cache_path = join_path(test_files_dir, 'cache')
 
 archive_dir      = 'test-files'
 archive_name     = archive_dir + '.tar.gz'
@@ -85,6 +90,10 @@ class StageTest(unittest.TestCase):
         self.old_tmp_dirs = spack.tmp_dirs
         spack.tmp_dirs = [test_tmp_path]
 
+        # ... and for its download cache.
+        self.old_download_cache = spack.download_cache
+        spack.download_cache = DownloadCache(test_cache_path)
+
         # record this since this test changes to directories that will
         # be removed.
         self.working_dir = os.getcwd()
@@ -99,6 +108,7 @@ class StageTest(unittest.TestCase):
 
         # restore spack's original tmp environment
         spack.tmp_dirs = self.old_tmp_dirs
+        spack.download_cache = self.old_download_cache
 
 
     def get_stage_path(self, stage, stage_name):
@@ -312,3 +322,138 @@ class StageTest(unittest.TestCase):
             self.assertTrue(os.path.isdir(path))
         except:
             pass # ignore here.
+
+
+    def test_download_cache(self):
+        archive = join_path(test_files_dir, archive_name)
+        digest = crypto.checksum(hashlib.md5, archive)
+
+        # A checked archive is stored in the download cache.  Its copy
+        # in the stage is not made read-only.
+        with Stage(URLFetchStrategy(archive_url, digest), name=stage_name) as stage:
+            stage.fetch()
+            stage.check()
+            self.assertTrue(os.access(stage.archive_file, os.W_OK))
+        cached = spack.download_cache.path_for(digest)
+        self.assertTrue(os.path.isfile(cached))
+
+        # Another stage gets it from the cache, not from the URL.
+        os.remove(archive)
+        with Stage(URLFetchStrategy(archive_url, digest), name=stage_name) as stage:
+            stage.fetch()
+            self.check_fetch(stage, stage_name)
+            stage.check()
+            stage.expand_archive()
+            self.check_expand_archive(stage, stage_name)
+        self.assertTrue(os.path.isfile(cached))
+
+
+    def test_download_cache_disabled(self):
+        archive = join_path(test_files_dir, archive_name)
+        digest = crypto.checksum(hashlib.md5, archive)
+
+        spack.download_cache = None
+        with Stage(URLFetchStrategy(archive_url, digest), name=stage_name) as stage:
+            stage.fetch()
+            self.check_fetch(stage, stage_name)
+            stage.check()
+
+
+    def test_digests_computed_while_fetching(self):
+        archive = join_path(test_files_dir, archive_name)
+        md5 = crypto.checksum(hashlib.md5, archive)
+        sha256 = crypto.checksum(hashlib.sha256, archive)
+
+        fetcher = URLFetchStrategy(archive_url, md5, hashes=['sha256'])
+        with Stage(fetcher, name=stage_name) as stage:
+            stage.fetch()
+            self.check_fetch(stage, stage_name)
+            self.assertEqual(fetcher.digests, {'md5' : md5, 'sha256' : sha256})
+            self.assertEqual(os.listdir(stage.path), [archive_name])
+
+            # The archive isn't read again to check or checksum it.
+            def no_checksum(*args, **kwargs):
+                self.fail("Archive was checksummed again.")
+            saved_checksum = crypto.checksum
+            crypto.checksum = no_checksum
+            try:
+                stage.check()
+                self.assertEqual(fetcher.archive_digest('sha256'), sha256)
+            finally:
+                crypto.checksum = saved_checksum
+            self.assertEqual(fetcher.archive_digest('sha1'),
+                             crypto.checksum(hashlib.sha1, archive))
+
+
+    def test_bad_digest_not_staged(self):
+        fetcher = URLFetchStrategy(archive_url, '0' * 32)
+        with Stage(fetcher, name=stage_name) as stage:
+            self.assertRaises(FetchError, stage.fetch)
+            self.assertEqual(os.listdir(stage.path), [])
+
+
+    def test_bad_digest_without_checksum(self):
+        archive = join_path(test_files_dir, archive_name)
+        md5 = crypto.checksum(hashlib.md5, archive)
+
+        fetcher = URLFetchStrategy(archive_url, '0' * 32)
+        saved_checksum_setting = spack.do_checksum
+        spack.do_checksum = False
+        try:
+            with Stage(fetcher, name=stage_name) as stage:
+                stage.fetch()
+                self.check_fetch(stage, stage_name)
+                self.assertEqual(fetcher.digests, {'md5' : md5})
+                self.assertRaises(ChecksumError, fetcher.check)
+        finally:
+            spack.do_checksum = saved_checksum_setting
+
+
+    def test_download_cache_lru(self):
+        cache = spack.download_cache
+        paths = []
+        for i, text in enumerate(('a' * 100, 'b' * 100, 'c' * 100)):
+            path = join_path(test_files_dir, 'file%d' % i)
+            with open(path, 'w') as f:
+                f.write(text)
+            cache.store(hashlib.md5(text).hexdigest(), path)
+            paths.append(cache.path_for(hashlib.md5(text).hexdigest()))
+            os.utime(paths[-1], (i, i))
+
+        # Using the oldest entry makes it the most recently used.
+        self.assertTrue(cache.fetch(hashlib.md5('a' * 100).hexdigest(),
+                                    join_path(test_files_dir, 'used')))
+        self.assertEqual(cache.size(), 300)
+
+        cache.prune(200)
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertFalse(os.path.exists(paths[1]))
+        self.assertTrue(os.path.exists(paths[2]))
+
+        cache.destroy()
+        self.assertEqual(cache.size(), 0)
+
+
+    def test_download_cache_concurrent_prune(self):
+        cache = DownloadCache(test_cache_path)
+        path = join_path(test_files_dir, 'file')
+        with open(path, 'w') as f:
+            f.write('a' * 100)
+        digest = hashlib.md5('a' * 100).hexdigest()
+        cache.store(digest, path)
+
+        # Stray files in the cache are ignored.
+        with open(join_path(cache.root, 'stray'), 'w') as f:
+            f.write('stray')
+        self.assertEqual(cache.size(), 100)
+
+        # Archives removed by another process are skipped.
+        stale = cache.entries()
+        os.remove(cache.path_for(digest))
+        cache.entries = lambda: stale
+        cache.prune(0)
+        del cache.entries
+        self.assertEqual(cache.size(), 0)
+        self.assertFalse(cache.fetch(digest, join_path(test_files_dir, 'used')))
+        cache.destroy()
+
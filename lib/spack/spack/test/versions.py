@@ -423,3 +423,43 @@ class VersionsTest(unittest.TestCase):
 
         self.assert_satisfies('4.8.0', '4.2, 4.3:4.8')
         self.assert_satisfies('4.8.2', '4.2, 4.3:4.8')
+
+
+    def test_versions_are_interned(self):
+        self.assertTrue(Version('1.2.3') is Version('1.2.3'))
+        self.assertTrue(ver('1.2.3') is Version('1.2.3'))
+        self.assertTrue(ver('1.2:1.4').start is Version('1.2'))
+
+        v = Version('1.2b3')
+        self.assertEqual(v.version, (1, 2, 'b', 3))
+        self.assertEqual(v.separators, ('.', '', ''))
+
+
+    def test_pickle(self):
+        import pickle
+        for protocol in (0, 2):
+            for v in (ver('1.2.3'), ver('1.2:1.4'), ver('1.2,1.4:1.6')):
+                self.assertEqual(pickle.loads(pickle.dumps(v, protocol)), v)
+
+
+    def test_intersection_with_any(self):
+        for v in ('1.2', '1.2:1.4', '1.2,1.4:1.6', ':1.3,2.0:'):
+            vlist = VersionList(v)
+            self.assertEqual(vlist.intersection(ver(':')), vlist)
+            self.assertEqual(ver(':').intersection(vlist), vlist)
+            self.assertTrue(vlist.satisfies(VersionList(':')))
+
+        # The result is a new list.
+        vlist = VersionList('1.2,1.4')
+        vlist.intersection(ver(':')).add(ver('1.6'))
+        self.assertEqual(vlist, VersionList('1.2,1.4'))
+
+
+    def test_copy(self):
+        vlist = VersionList('1.2:1.4,1.6')
+        copy = vlist.copy()
+        self.assertEqual(vlist, copy)
+
+        copy.add(ver('1.8'))
+        self.assertEqual(vlist, VersionList('1.2:1.4,1.6'))
+        self.assertEqual(copy, VersionList('1.2:1.4,1.6,1.8'))
@@ -0,0 +1,138 @@
+##############################################################################
+# Copyright (c) 2013-2015, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Written by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/llnl/spack
+# Please also see the LICENSE file for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License (as published by
+# the Free Software Foundation) version 2.1 dated February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""
+Tests for the web spider in spack.util.web, against a local server.
+"""
+import shutil
+import tempfile
+import threading
+import unittest
+import BaseHTTPServer
+
+from spack.util.web import *
+
+pages = {
+    '/foo/'      : '<a href="foo-1.0.tar.gz">1.0</a><a href="sub/">sub</a>'
+                   '<a href="sub2/">sub2</a><a href="../other/">other</a>',
+    '/foo/sub/'  : '<a href="../foo-2.0.tar.gz">2.0</a><a href="../sub2/">sub2</a>',
+    '/foo/sub2/' : '<a href="foo-3.0.tar.gz">3.0</a><a href="../sub/">sub</a>',
+}
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path not in pages:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = '"%d"' % hash(pages[self.path])
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(pages[self.path])))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(pages[self.path])
+
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadedServer(BaseHTTPServer.HTTPServer):
+    """Serves each connection in its own thread, so that keep-alive
+       connections don't block each other."""
+    def process_request(self, request, client_address):
+        t = threading.Thread(target=self.finish_and_close,
+                             args=(request, client_address))
+        t.daemon = True
+        t.start()
+
+    def finish_and_close(self, request, client_address):
+        self.finish_request(request, client_address)
+        self.shutdown_request(request)
+
+
+class SpiderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadedServer(('127.0.0.1', 0), Handler)
+        self.server.requests = []
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.root = 'http://127.0.0.1:%d/foo/' % self.server.server_port
+        self.cache_dir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+    def spider(self, **kwargs):
+        spider = Spider(3, cache=HttpCache(self.cache_dir), **kwargs)
+        return spider.spider(self.root)
+
+
+    def test_spider(self):
+        pages, links = self.spider()
+        self.assertEqual(sorted(pages), [self.root, self.root + 'sub/',
+                                         self.root + 'sub2/'])
+        self.assertTrue(self.root + 'foo-2.0.tar.gz' in links)
+        self.assertTrue(self.root + 'sub2/foo-3.0.tar.gz' in links)
+
+        # Each page is fetched once, and nothing outside the root is.
+        self.assertEqual(sorted(self.server.requests),
+                         ['/foo/', '/foo/sub/', '/foo/sub2/'])
+
+
+    def test_connections_reused(self):
+        self.spider(threads=1)
+        self.assertEqual(self.server.connections, 1)
+
+
+    def test_cached_pages_revalidated(self):
+        first = self.spider()
+        second = self.spider()
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 6)
@@ -36,12 +36,15 @@ _acceptable_hashes = [
 """Index for looking up hasher for a digest."""
 _size_to_hash = dict((h().digest_size, h) for h in _acceptable_hashes)
 
+"""Size of the blocks that files are read and hashed in, by default."""
+default_block_size = 2**20
+
 
 def checksum(hashlib_algo, filename, **kwargs):
     """Returns a hex digest of the filename generated using an
        algorithm from hashlib.
     """
-    block_size = kwargs.get('block_size', 2**20)
+    block_size = kwargs.get('block_size', default_block_size)
     hasher = hashlib_algo()
     with open(filename) as file:
         while True:
@@ -75,7 +78,7 @@ class Checker(object):
        a 1MB (2**20 bytes) buffer.
     """
     def __init__(self, hexdigest, **kwargs):
-        self.block_size = kwargs.get('block_size', 2**20)
+        self.block_size = kwargs.get('block_size', default_block_size)
         self.hexdigest = hexdigest
         self.sum       = None
 
@@ -26,11 +26,24 @@
 This implements a parallel map operation but it can accept more values
 than multiprocessing.Pool.apply() can.  For example, apply() will fail
 to pickle functions if they're passed indirectly as parameters.
+
+parmap() forks a bounded number of worker processes, which inherit
+the function and its inputs, so neither needs to be picklable.  Only
+the results are sent back to the parent.
 """
+import os
+import time
+import select
+import pickle
+import traceback
+import multiprocessing
+from collections import deque
 from multiprocessing import Process, Pipe, Semaphore, Value
-from itertools import izip
 
-__all__ = ['spawn', 'parmap', 'Barrier']
+import spack.error
+
+__all__ = ['spawn', 'parmap', 'wait_for_any', 'Barrier', 'ParmapError',
+           'ParmapTimeoutError']
 
 def spawn(f):
     def fun(pipe,x):
@@ -38,12 +51,162 @@ def spawn(f):
         pipe.close()
     return fun
 
-def parmap(f,X):
-    pipe=[Pipe() for x in X]
-    proc=[Process(target=spawn(f),args=(c,x)) for x,(p,c) in izip(X,pipe)]
-    [p.start() for p in proc]
-    [p.join() for p in proc]
-    return [p.recv() for (p,c) in pipe]
+
+def _work(f, X, conn):
+    """Worker loop for parmap().  Receives chunks of indices into X
+       from the parent, and sends back one result per index."""
+    while True:
+        chunk = conn.recv()
+        if chunk is None:
+            break
+
+        for i in chunk:
+            try:
+                conn.send((i, True, f(X[i]), None))
+            except Exception, e:
+                tb = traceback.format_exc()
+
+                # Only send the exception if it survives the trip.
+                try:
+                    pickle.loads(pickle.dumps(e, 2))
+                except Exception:
+                    e = None
+                conn.send((i, False, e, tb))
+    conn.close()
+
+
+class _Worker(object):
+    """Parent's handle on a parmap() worker and the tasks it has."""
+    def __init__(self, f, X):
+        self.conn, child_conn = Pipe()
+        self.process = Process(target=_work, args=(f, X, child_conn))
+        self.process.start()
+
+        # Close our copy of the child's end, so that we see EOF if the
+        # worker dies.
+        child_conn.close()
+
+        self.tasks = deque()
+        self.started = time.time()
+
+
+    def assign(self, chunk):
+        """Give this worker a chunk of tasks, or None to stop it."""
+        if chunk is not None:
+            self.tasks.extend(chunk)
+            self.started = time.time()
+        self.conn.send(chunk)
+
+
+    def fileno(self):
+        return self.conn.fileno()
+
+
+def parmap(f, X, jobs=None, chunk_size=None, timeout=None):
+    """Returns [f(x) for x in X], computed in parallel processes.
+
+    Options:
+
+    jobs        Maximum number of worker processes.  Defaults to the
+                number of CPUs.
+    chunk_size  Number of elements of X a worker is given at once.
+                By default, each worker gets about four chunks.
+    timeout     Seconds a single call to f may take.  If one takes
+                longer, parmap() raises ParmapTimeoutError.
+
+    Results are in the same order as X.  If f raises an exception,
+    the exception is raised again here, or a ParmapError is raised
+    if it can't be sent back from the worker.  Either way, the other
+    workers are stopped.
+    """
+    X = list(X)
+    if not X:
+        return []
+
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(X)))
+
+    if chunk_size is None:
+        chunk_size = -(-len(X) // (jobs * 4))
+    chunks = deque(range(i, min(i + chunk_size, len(X)))
+                   for i in xrange(0, len(X), chunk_size))
+
+    results = [None] * len(X)
+    workers = []
+    try:
+        for j in xrange(jobs):
+            worker = _Worker(f, X)
+            worker.assign(chunks.popleft())
+            workers.append(worker)
+
+        busy = list(workers)
+        while busy:
+            wait = None
+            if timeout is not None:
+                deadline = min(w.started + timeout for w in busy)
+                wait = max(0, deadline - time.time())
+
+            ready, _, _ = select.select(busy, [], [], wait)
+            now = time.time()
+
+            for worker in ready:
+                task = worker.tasks[0]
+                try:
+                    i, ok, value, tb = worker.conn.recv()
+                except EOFError:
+                    raise ParmapError(
+                        "Worker process exited while running task %d: %s"
+                        % (task, X[task]))
+
+                if not ok:
+                    if value is not None:
+                        raise value
+                    raise ParmapError(
+                        "Task %d failed: %s" % (i, X[i]), tb)
+
+                results[i] = value
+                worker.tasks.popleft()
+                worker.started = now
+
+                if not worker.tasks:
+                    worker.assign(chunks.popleft() if chunks else None)
+                    if not worker.tasks:
+                        busy.remove(worker)
+
+            if timeout is not None:
+                for worker in busy:
+                    if now - worker.started > timeout:
+                        task = worker.tasks[0]
+                        raise ParmapTimeoutError(
+                            "Task %d took more than %ss: %s"
+                            % (task, timeout, X[task]))
+
+    finally:
+        for worker in workers:
+            if worker.tasks:
+                worker.process.terminate()
+            worker.process.join()
+            worker.conn.close()
+
+    return results
+
+
+def wait_for_any(pids):
+    """Wait for one of the child processes in pids to exit.
+
+    Returns its pid and exit status, as from os.waitpid().  Unlike
+    os.waitpid(-1, 0), this does not reap other children of this
+    process, which their owners may still be waiting for.
+    """
+    delay = 0.001
+    while True:
+        for pid in pids:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return done, status
+        time.sleep(delay)
+        delay = min(2 * delay, 0.05)
 
 
 class Barrier:
@@ -91,3 +254,13 @@ class Barrier:
 
 
 class BarrierTimeoutError: pass
+
+
+class ParmapError(spack.error.SpackError):
+    """Raised when a task run by parmap() fails."""
+    def __init__(self, message, long_message=None):
+        super(ParmapError, self).__init__(message, long_message)
+
+
+class ParmapTimeoutError(ParmapError):
+    """Raised when a task run by parmap() takes too long."""
@@ -25,13 +25,19 @@
 import re
 import os
 import sys
-import subprocess
-import urllib2, cookielib
+import json
+import shutil
+import socket
+import hashlib
+import httplib
+import threading
+import Queue
+import urllib, urllib2, cookielib
 import urlparse
-from multiprocessing import Pool
 from HTMLParser import HTMLParser, HTMLParseError
 
 import llnl.util.tty as tty
+from llnl.util.filesystem import mkdirp
 
 import spack
 import spack.error
@@ -40,6 +46,15 @@ from spack.util.compression import ALLOWED_ARCHIVE_TYPES
 # Timeout in seconds for web requests
 TIMEOUT = 10
 
+# Max number of pages the spider fetches at once
+SPIDER_THREADS = 8
+
+# Max number of redirects followed for one page
+MAX_REDIRECTS = 5
+
+# Sent with requests, like urllib2 does.
+USER_AGENT = 'Python-urllib/%s' % sys.version[:3]
+
 
 class LinkParser(HTMLParser):
     """This parser just takes an HTML page and strips out the hrefs on the
@@ -55,113 +70,347 @@ class LinkParser(HTMLParser):
                     self.links.append(val)
 
 
-def _spider(args):
-    """_spider(url, depth, max_depth)
+class HttpCache(object):
+    """On-disk cache of web pages.
+
+    Pages are stored by URL in ``<root>/<hash of URL>.json``, with
+    their ETag and Last-Modified headers.  A cached page is used
+    when the server says it has not changed since then.  Pages
+    without either header can't be revalidated, so they aren't
+    cached.
+    """
+    def __init__(self, root):
+        self.root = root
+
+
+    def path_for(self, url):
+        return os.path.join(self.root, hashlib.sha1(url).hexdigest() + '.json')
+
+
+    def get(self, url):
+        """Cached entry for url, or None."""
+        path = self.path_for(url)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (IOError, ValueError), e:
+            tty.debug("Could not read cached page %s: %s" % (path, e))
+            return None
+
+
+    def put(self, url, entry):
+        """Cache entry for url.  Safe to call from several threads."""
+        dest = self.path_for(url)
+        tmp = '%s.%d.%d.tmp' % (dest, os.getpid(), threading.current_thread().ident)
+        try:
+            mkdirp(self.root)
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp, dest)
+        except (IOError, OSError), e:
+            tty.debug("Could not cache page %s: %s" % (url, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
 
-       Fetches URL and any pages it links to up to max_depth.  depth should
-       initially be 1, and max_depth includes the root.  This function will
-       print out a warning only if the root can't be fetched; it ignores
-       errors with pages that the root links to.
 
-       This will return a list of the pages fetched, in no particular order.
+    def destroy(self):
+        """Remove all cached pages."""
+        shutil.rmtree(self.root, ignore_errors=True)
 
-       Takes args as a tuple b/c it's intended to be used by a multiprocessing
-       pool.  Firing off all the child links at once makes the fetch MUCH
-       faster for pages with lots of children.
+
+class ConnectionPool(object):
+    """Keep-alive HTTP and HTTPS connections, by host.
+
+    A connection is used by one thread at a time.  Threads take an
+    idle connection to a host, or open a new one, and give it back
+    when they have read the whole response.
     """
-    url, visited, root, opener, depth, max_depth, raise_on_error = args
+    def __init__(self):
+        self.idle = {}
+        self.lock = threading.Lock()
+
+
+    def _get(self, scheme, netloc):
+        with self.lock:
+            conns = self.idle.get((scheme, netloc))
+            if conns:
+                return conns.pop(), True
 
-    pages = {}     # dict from page URL -> text content.
-    links = set()  # set of all links seen on visited pages.
+        if scheme == 'https':
+            conn = httplib.HTTPSConnection(netloc, timeout=TIMEOUT)
+        else:
+            conn = httplib.HTTPConnection(netloc, timeout=TIMEOUT)
+        return conn, False
 
+
+    def _put(self, scheme, netloc, conn):
+        with self.lock:
+            self.idle.setdefault((scheme, netloc), []).append(conn)
+
+
+    def request(self, url, headers, wants_body):
+        """GET url.  Returns the response status and headers, and the
+           body if ``wants_body(status, headers)`` is true.  Raises
+           URLError if the request fails."""
+        parts = urlparse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        while True:
+            conn, reused = self._get(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                break
+            except (httplib.HTTPException, socket.error), e:
+                conn.close()
+                # Servers close idle keep-alive connections, so retry
+                # those with a new connection.
+                if not reused:
+                    raise urllib2.URLError(e)
+
+        resp_headers = dict(resp.getheaders())
+        body = None
+        try:
+            if wants_body(resp.status, resp_headers):
+                body = resp.read()
+        except (httplib.HTTPException, socket.error), e:
+            conn.close()
+            raise urllib2.URLError(e)
+
+        # Don't download bodies we don't want just to reuse the connection.
+        if body is None or resp.will_close:
+            conn.close()
+        else:
+            self._put(parts.scheme, parts.netloc, conn)
+        return resp.status, resp_headers, body
+
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle.clear()
+
+
+def _is_html(headers):
+    content_type = headers.get('content-type')
+    return content_type is not None and content_type.startswith('text/html')
+
+
+def _use_urllib2(url):
+    """Whether url has to be fetched with urllib2, rather than with a
+       pooled connection: for proxies and URLs that aren't HTTP."""
+    parts = urlparse.urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        return True
+    return (parts.scheme in urllib.getproxies() and
+            not urllib.proxy_bypass(parts.hostname or ''))
+
+
+def _fetch_urllib2(url, headers):
+    """Fetch url with urllib2.  Returns (status, final url, headers,
+       body), with the body only if the page is HTML."""
     try:
-        # Make a HEAD request first to check the content type.  This lets
-        # us ignore tarballs and gigantic files.
-        # It would be nice to do this with the HTTP Accept header to avoid
-        # one round-trip.  However, most servers seem to ignore the header
-        # if you ask for a tarball with Accept: text/html.
-        req = urllib2.Request(url)
-        req.get_method = lambda: "HEAD"
-        resp = urllib2.urlopen(req, timeout=TIMEOUT)
-
-        if not "Content-type" in resp.headers:
-            tty.debug("ignoring page " + url)
-            return pages, links
-
-        if not resp.headers["Content-type"].startswith('text/html'):
-            tty.debug("ignoring page " + url + " with content type " +
-                      resp.headers["Content-type"])
-            return pages, links
-
-        # Do the real GET request when we know it's just HTML.
-        req.get_method = lambda: "GET"
-        response = urllib2.urlopen(req, timeout=TIMEOUT)
-        response_url = response.geturl()
-
-        # Read the page and and stick it in the map we'll return
-        page = response.read()
-        pages[response_url] = page
-
-        # Parse out the links in the page
-        link_parser = LinkParser()
-        subcalls = []
-        link_parser.feed(page)
-
-        while link_parser.links:
-            raw_link = link_parser.links.pop()
-            abs_link = urlparse.urljoin(response_url, raw_link)
-
-            links.add(abs_link)
-
-            # Skip stuff that looks like an archive
-            if any(raw_link.endswith(suf) for suf in ALLOWED_ARCHIVE_TYPES):
-                continue
+        resp = urllib2.urlopen(urllib2.Request(url, headers=headers),
+                               timeout=TIMEOUT)
+    except urllib2.HTTPError, e:
+        if e.code == 304:
+            return 304, url, {}, None
+        raise
 
-            # Skip things outside the root directory
-            if not abs_link.startswith(root):
-                continue
+    resp_headers = dict((k.lower(), v) for k, v in resp.headers.items())
+    body = resp.read() if _is_html(resp_headers) else None
+    return resp.getcode() or 200, resp.geturl(), resp_headers, body
 
-            # Skip already-visited links
-            if abs_link in visited:
-                continue
 
-        # If we're not at max depth, follow links.
-        if depth < max_depth:
-            subcalls.append((abs_link, visited, root, None,
-                             depth+1, max_depth, raise_on_error))
-            visited.add(abs_link)
+def _fetch(url, headers, pool):
+    """Like _fetch_urllib2(), but with pooled connections."""
+    if _use_urllib2(url):
+        return _fetch_urllib2(url, headers)
+
+    def wants_body(status, headers):
+        return status != 200 or _is_html(headers)
+
+    for i in range(MAX_REDIRECTS + 1):
+        status, resp_headers, body = pool.request(url, headers, wants_body)
+        if status in (301, 302, 303, 307, 308) and 'location' in resp_headers:
+            url = urlparse.urljoin(url, resp_headers['location'])
+            if _use_urllib2(url):
+                return _fetch_urllib2(url, headers)
+            continue
+
+        if status not in (200, 304):
+            raise urllib2.HTTPError(url, status, "HTTP Error %d" % status,
+                                    resp_headers, None)
+        return status, url, resp_headers, body
 
-        if subcalls:
+    raise urllib2.URLError("Too many redirects")
+
+
+def get_page(url, pool, cache=None):
+    """Get the HTML page at url.
+
+    Returns the URL of the page after any redirects, and its text.
+    Returns (None, None) if url isn't an HTML page.  If a cache is
+    given, cached pages are revalidated with the server instead of
+    being downloaded again.
+    """
+    headers = { 'User-Agent' : USER_AGENT }
+    entry = cache.get(url) if cache else None
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    status, page_url, resp_headers, page = _fetch(url, headers, pool)
+
+    if status == 304 and entry:
+        tty.debug("using cached page " + url)
+        return entry['page_url'], entry['page'].encode('latin-1')
+
+    if not _is_html(resp_headers):
+        tty.debug("ignoring page %s with content type %s"
+                  % (url, resp_headers.get('content-type')))
+        return None, None
+
+    etag = resp_headers.get('etag')
+    last_modified = resp_headers.get('last-modified')
+    if cache and (etag or last_modified):
+        cache.put(url, { 'page_url'      : page_url,
+                         'etag'          : etag,
+                         'last_modified' : last_modified,
+                         'page'          : page.decode('latin-1') })
+    return page_url, page
+
+
+class Spider(object):
+    """Fetches pages under a set of root URLs, following links.
+
+    Pages are fetched by a bounded pool of threads that share keep-alive
+    connections.  Each URL is fetched only once, no matter how many
+    pages link to it.  The root URLs are depth 1, and links are
+    followed from pages up to ``max_depth``.  Only links that start
+    with the root they were found under are followed.
+    """
+    def __init__(self, max_depth=1, threads=None, cache=None):
+        self.max_depth = max_depth
+        self.threads = threads or SPIDER_THREADS
+        self.cache = cache
+
+        self.pages = {}     # dict from page URL -> text content.
+        self.links = set()  # set of all links seen on visited pages.
+
+        self.pool = ConnectionPool()
+        self.visited = set()
+        self.lock = threading.Lock()
+        self.queue = Queue.Queue()
+
+
+    def spider(self, *root_urls):
+        """Fetch pages under all the root URLs.  Returns a dict of
+           pages by URL, and a set of all the links on them."""
+        for url in root_urls:
+            self._add(url, url, 1)
+
+        workers = [threading.Thread(target=self._work)
+                   for i in range(self.threads)]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+
+        self.queue.join()
+        for worker in workers:
+            self.queue.put(None)
+        for worker in workers:
+            worker.join()
+
+        self.pool.close()
+        return self.pages, self.links
+
+
+    def _add(self, url, root, depth):
+        """Queue url for a visit, unless it was already visited.
+           Call with the lock held, or before workers start."""
+        if url not in self.visited:
+            self.visited.add(url)
+            self.queue.put((url, root, depth))
+
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
             try:
-                pool = Pool(processes=len(subcalls))
-                results = pool.map(_spider, subcalls)
-                for sub_pages, sub_links in results:
-                    pages.update(sub_pages)
-                    links.update(sub_links)
+                self._visit(*item)
             finally:
-                pool.terminate()
-                pool.join()
+                self.queue.task_done()
+
+
+    def _visit(self, url, root, depth):
+        try:
+            page_url, page = get_page(url, self.pool, self.cache)
+            if page is None:
+                return
+
+            # Parse out the links in the page
+            link_parser = LinkParser()
+            link_parser.feed(page)
+
+            links = set()
+            follow = []
+            for raw_link in link_parser.links:
+                abs_link = urlparse.urljoin(page_url, raw_link)
+                links.add(abs_link)
+
+                # Skip stuff that looks like an archive
+                if any(raw_link.endswith(suf) for suf in ALLOWED_ARCHIVE_TYPES):
+                    continue
+
+                # Skip things outside the root directory
+                if not abs_link.startswith(root):
+                    continue
+
+                follow.append(abs_link)
+
+            with self.lock:
+                self.pages[page_url] = page
+                self.links.update(links)
+
+                # If we're not at max depth, follow links.
+                if depth < self.max_depth:
+                    for link in follow:
+                        self._add(link, root, depth + 1)
+
+        except urllib2.URLError, e:
+            tty.debug(e)
 
-    except urllib2.URLError, e:
-        tty.debug(e)
-        if raise_on_error:
-            raise spack.error.NoNetworkConnectionError(str(e), url)
+        except HTMLParseError, e:
+            # This error indicates that Python's HTML parser sucks.
+            msg = "Got an error parsing HTML."
 
-    except HTMLParseError, e:
-        # This error indicates that Python's HTML parser sucks.
-        msg = "Got an error parsing HTML."
+            # Pre-2.7.3 Pythons in particular have rather prickly HTML parsing.
+            if sys.version_info[:3] < (2,7,3):
+                msg += " Use Python 2.7.3 or newer for better HTML parsing."
 
-        # Pre-2.7.3 Pythons in particular have rather prickly HTML parsing.
-        if sys.version_info[:3] < (2,7,3):
-            msg += " Use Python 2.7.3 or newer for better HTML parsing."
+            tty.warn(msg, url, "HTMLParseError: " + str(e))
 
-        tty.warn(msg, url, "HTMLParseError: " + str(e))
+        except Exception, e:
+            # Other types of errors are completely ignored, except in debug mode.
+            tty.debug("Error in spider: %s" % e)
 
-    except Exception, e:
-        # Other types of errors are completely ignored, except in debug mode.
-        tty.debug("Error in _spider: %s" % e)
 
-    return pages, links
+def _cache():
+    """The HTTP cache configured for Spack, or None."""
+    if spack.web_cache_path is None:
+        return None
+    return HttpCache(spack.web_cache_path)
 
 
 def spider(root_url, **kwargs):
@@ -169,12 +418,11 @@ def spider(root_url, **kwargs):
        If depth is specified (e.g., depth=2), then this will also fetches pages
        linked from the root and its children up to depth.
 
-       This will spawn processes to fetch the children, for much improved
+       Pages are fetched by a pool of threads, for much improved
        performance over a sequential fetch.
     """
     max_depth = kwargs.setdefault('depth', 1)
-    pages, links = _spider((root_url, set(), root_url, None, 1, max_depth, False))
-    return pages, links
+    return Spider(max_depth, cache=_cache()).spider(root_url)
 
 
 def find_versions_of_archive(*archive_urls, **kwargs):
@@ -207,13 +455,9 @@ def find_versions_of_archive(*archive_urls, **kwargs):
     for aurl in archive_urls:
         list_urls.add(spack.url.find_list_url(aurl))
 
-    # Grab some web pages to scrape.
-    pages = {}
-    links = set()
-    for lurl in list_urls:
-        p, l = spider(lurl, depth=list_depth)
-        pages.update(p)
-        links.update(l)
+    # Grab some web pages to scrape.  All the list URLs are spidered
+    # together, so they share threads and connections.
+    pages, links = Spider(list_depth, cache=_cache()).spider(*list_urls)
 
     # Scrape them for archive URLs
     regexes = []
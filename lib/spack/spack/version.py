@@ -94,7 +94,7 @@ def coerced(method):
     """Decorator that ensures that argument types of a method are coerced."""
     @wraps(method)
     def coercing_method(a, b, *args, **kwargs):
-        if type(a) == type(b) or a is None or b is None:
+        if type(a) is type(b) or a is None or b is None:
             return method(a, b, *args, **kwargs)
         else:
             ca, cb = coerce_versions(a, b)
@@ -102,27 +102,55 @@ def coerced(method):
     return coercing_method
 
 
+# Splits a version string into alternating separators and segments.
+_segment_regex = re.compile(r'([a-zA-Z]+|[0-9]+)')
+
+# Versions are immutable, so each distinct version string is only
+# parsed once and all Versions made from it share one object.
+_versions = {}
+
+
+def _segment_key(seg):
+    """Sort key for a version segment.  Numbers are always "newer" than
+       letters, for consistency with RPM (see Version.__lt__)."""
+    return (1, seg) if type(seg) == int else (0, seg)
+
+
 @total_ordering
 class Version(object):
     """Class to represent versions"""
-    def __init__(self, string):
+    __slots__ = ('string', 'version', 'separators', '_key')
+
+    def __new__(cls, string):
         string = str(string)
+        if string in _versions:
+            return _versions[string]
 
         if not re.match(VALID_VERSION, string):
             raise ValueError("Bad characters in version string: %s" % string)
 
+        self = super(Version, cls).__new__(cls)
+
         # preserve the original string, but trimmed.
-        string = string.strip()
-        self.string = string
+        self.string = string.strip()
+
+        # Split version into alphabetical and numeric segments, and
+        # keep the separators between them from the original version
+        # string as well.
+        parts = _segment_regex.split(self.string)
+        self.version = tuple(int_if_int(seg) for seg in parts[1::2])
+        self.separators = tuple(parts[2:-1:2])
+
+        # Comparing these tuples orders versions like __lt__ describes,
+        # so comparisons between Versions are just tuple comparisons.
+        self._key = tuple(_segment_key(seg) for seg in self.version)
+
+        _versions[string] = self
+        return self
 
-        # Split version into alphabetical and numeric segments
-        segment_regex = r'[a-zA-Z]+|[0-9]+'
-        segments = re.findall(segment_regex, string)
-        self.version = tuple(int_if_int(seg) for seg in segments)
 
-        # Store the separators from the original version string as well.
-        # last element of separators is ''
-        self.separators = tuple(re.split(segment_regex, string)[1:-1])
+    def __reduce__(self):
+        return (Version, (self.string,))
 
 
     def up_to(self, index):
@@ -140,13 +168,16 @@ class Version(object):
         return self
 
 
-    @coerced
     def satisfies(self, other):
         """A Version 'satisfies' another if it is at least as specific and has a
            common prefix.  e.g., we want gcc@4.7.3 to satisfy a request for
            gcc@4.7 so that when a user asks to build with gcc@4.7, we can find
            a suitable compiler.
         """
+        if type(other) is not Version and other is not None:
+            a, b = coerce_versions(self, other)
+            return a.satisfies(b)
+
         nself  = len(self.version)
         nother = len(other.version)
         return nother <= nself and self.version[:nother] == other.version
@@ -203,43 +234,57 @@ class Version(object):
         return self
 
 
-    @coerced
     def __lt__(self, other):
         """Version comparison is designed for consistency with the way RPM
            does things.  If you need more complicated versions in installed
            packages, you should override your package's version string to
            express it more sensibly.
+
+           Segments are compared in order.  Numbers are always "newer"
+           than letters.  This is for consistency with RPM.  See patch
+           #60884 (and details) from bugzilla #50977 in the RPM project
+           at rpm.org.  Or look at rpmvercmp.c if you want to see how
+           this is implemented there.  If the common prefix is equal,
+           the one with more segments is bigger.  _key encodes all of
+           this, so Versions are compared by their keys.
         """
-        if other is None:
+        if type(other) is Version:
+            return self._key < other._key
+        elif other is None:
             return False
 
-        # Coerce if other is not a Version
-        # simple equality test first.
-        if self.version == other.version:
-            return False
+        a, b = coerce_versions(self, other)
+        return a < b
 
-        for a, b in zip(self.version, other.version):
-            if a == b:
-                continue
-            else:
-                # Numbers are always "newer" than letters.  This is for
-                # consistency with RPM.  See patch #60884 (and details)
-                # from bugzilla #50977 in the RPM project at rpm.org.
-                # Or look at rpmvercmp.c if you want to see how this is
-                # implemented there.
-                if type(a) != type(b):
-                    return type(b) == int
-                else:
-                    return a < b
 
-        # If the common prefix is equal, the one with more segments is bigger.
-        return len(self.version) < len(other.version)
+    # The other comparisons are defined here, rather than by
+    # total_ordering, so that they are also single key comparisons.
+    def __gt__(self, other):
+        if type(other) is Version:
+            return self._key > other._key
+        return not (self < other or self == other)
+
+
+    def __le__(self, other):
+        if type(other) is Version:
+            return self._key <= other._key
+        return self < other or self == other
+
+
+    def __ge__(self, other):
+        if type(other) is Version:
+            return self._key >= other._key
+        return not self < other
 
 
-    @coerced
     def __eq__(self, other):
-        return (other is not None and
-                type(other) == Version and self.version == other.version)
+        if type(other) is Version:
+            return self is other or self.version == other.version
+        elif other is None:
+            return False
+
+        a, b = coerce_versions(self, other)
+        return a == b
 
 
     def __ne__(self, other):
@@ -250,10 +295,12 @@ class Version(object):
         return hash(self.version)
 
 
-    @coerced
     def __contains__(self, other):
         if other is None:
             return False
+        elif type(other) is not Version:
+            a, b = coerce_versions(self, other)
+            return b in a
         return other.version[:len(self.version)] == self.version
 
 
@@ -299,6 +346,8 @@ class Version(object):
 
 @total_ordering
 class VersionRange(object):
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
         if isinstance(start, basestring):
             start = Version(start)
@@ -311,6 +360,10 @@ class VersionRange(object):
             raise ValueError("Invalid Version range: %s" % self)
 
 
+    def __reduce__(self):
+        return (VersionRange, (self.start, self.end))
+
+
     def lowest(self):
         return self.start
 
@@ -501,6 +554,8 @@ class VersionRange(object):
 @total_ordering
 class VersionList(object):
     """Sorted, non-redundant list of Versions and VersionRanges."""
+    __slots__ = ('versions',)
+
     def __init__(self, vlist=None):
         self.versions = []
         if vlist is not None:
@@ -516,24 +571,31 @@ class VersionList(object):
                     self.add(ver(v))
 
 
+    def __reduce__(self):
+        return (VersionList, (self.versions,))
+
+
     def add(self, version):
         if type(version) in (Version, VersionRange):
             # This normalizes single-value version ranges.
             if version.concrete:
                 version = version.concrete
 
-            i = bisect_left(self, version)
+            versions = self.versions
+            i = bisect_left(versions, version)
 
-            while i-1 >= 0 and version.overlaps(self[i-1]):
-                version = version.union(self[i-1])
-                del self.versions[i-1]
-                i -= 1
+            # Merge with any overlapping neighbors, then replace them
+            # all at once.
+            lo = hi = i
+            while lo > 0 and version.overlaps(versions[lo-1]):
+                version = version.union(versions[lo-1])
+                lo -= 1
 
-            while i < len(self) and version.overlaps(self[i]):
-                version = version.union(self[i])
-                del self.versions[i]
+            while hi < len(versions) and version.overlaps(versions[hi]):
+                version = version.union(versions[hi])
+                hi += 1
 
-            self.versions.insert(i, version)
+            versions[lo:hi] = [version]
 
         elif type(version) == VersionList:
             for v in version:
@@ -552,7 +614,18 @@ class VersionList(object):
 
 
     def copy(self):
-        return VersionList(self)
+        # Our versions are already sorted and merged.
+        clone = VersionList()
+        clone.versions = list(self.versions)
+        return clone
+
+
+    def _is_any(self):
+        """True if this is the list that contains every version (':')."""
+        if len(self.versions) != 1:
+            return False
+        v = self.versions[0]
+        return type(v) is VersionRange and v.start is None and v.end is None
 
 
     def lowest(self):
@@ -620,14 +693,19 @@ class VersionList(object):
         if not other or not self:
             return False
 
+        # Everything satisfies ':'.
+        if other._is_any():
+            return True
+
         if strict:
             return self in other
 
+        sv, ov = self.versions, other.versions
         s = o = 0
-        while s < len(self) and o < len(other):
-            if self[s].satisfies(other[o]):
+        while s < len(sv) and o < len(ov):
+            if sv[s].satisfies(ov[o]):
                 return True
-            elif self[s] < other[o]:
+            elif sv[s] < ov[o]:
                 s += 1
             else:
                 o += 1
@@ -649,10 +727,17 @@ class VersionList(object):
 
     @coerced
     def intersection(self, other):
+        # Intersecting with ':' is common when concretizing, and
+        # doesn't change anything.
+        if other._is_any():
+            return self.copy()
+        elif self._is_any():
+            return other.copy()
+
         # TODO: make this faster.  This is O(n^2).
         result = VersionList()
-        for s in self:
-            for o in other:
+        for s in self.versions:
+            for o in other.versions:
                 result.add(s.intersection(o))
         return result
 
@@ -726,6 +811,11 @@ class VersionList(object):
         return str(self.versions)
 
 
+# Ranges parsed from strings, by string.  Like Versions, VersionRanges
+# are never modified, so they can be shared.
+_ranges = {}
+
+
 def _string_to_version(string):
     """Converts a string to a Version, VersionList, or VersionRange.
        This is private.  Client code should use ver().
@@ -736,10 +826,12 @@ def _string_to_version(string):
         return VersionList(string.split(','))
 
     elif ':' in string:
-        s, e = string.split(':')
-        start = Version(s) if s else None
-        end   = Version(e) if e else None
-        return VersionRange(start, end)
+        if string not in _ranges:
+            s, e = string.split(':')
+            start = Version(s) if s else None
+            end   = Version(e) if e else None
+            _ranges[string] = VersionRange(start, end)
+        return _ranges[string]
 
     else:
         return Version(string)
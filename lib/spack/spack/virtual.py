@@ -63,14 +63,22 @@ class ProviderIndex(object):
             self.update(spec)
 
 
-    def update(self, spec):
+    def update(self, spec, provided=None):
+        """Add the virtual packages provided by spec to the index.
+
+        ``provided`` maps provided virtual specs to the ``when`` specs
+        that provide them, as in ``Package.provided``.  If it is not
+        given, it is taken from spec's package.
+        """
         if type(spec) != spack.spec.Spec:
             spec = spack.spec.Spec(spec)
 
         assert(not spec.virtual)
 
-        pkg = spec.package
-        for provided_spec, provider_spec in pkg.provided.iteritems():
+        if provided is None:
+            provided = spec.package.provided
+
+        for provided_spec, provider_spec in provided.iteritems():
             if provider_spec.satisfies(spec, deps=False):
                 provided_name = provided_spec.name
 